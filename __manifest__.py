@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 {
     "name": "Project Implementation",
-    "version": "1.0.2",
+    "version": "1.0.7",
     "summary": "UI helpers for creating/opening project implementations",
     "description": "Adds a Manage Implementation button and a list of funded projects with status 'contractat'.",
     "author": "officeedumax-dot",
@@ -14,6 +14,7 @@
     ],
 	'data': [
 	  'security/ir.model.access.csv',
+	  'data/ir_cron_data.xml',
 	  'views/implementation_tree.xml',
 	  'views/implementation_views.xml',
 	  'views/create_implementation_wizard.xml',
@@ -24,6 +25,11 @@
 	  'views/implementation_budget_views.xml',
           'views/project_file_views.xml',
 	  'views/project_file_add_wizard_views.xml',
+	  'views/project_file_upload_templates.xml',
+	  'views/document_import_ubl_wizard_views.xml',
+	  'views/contract_import_wizard_views.xml',
+	  'views/implementation_reimport_wizard_views.xml',
+	  'views/settlement_fill_wizard_views.xml',
 	],
     'installable': True,
     'application': True,
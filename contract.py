@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+from collections import Counter
+
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
 
@@ -8,6 +10,8 @@ class ProjectContract(models.Model):
     _description = 'Contract proiect'
     _order = 'contract_date desc, id desc'
     _rec_name = 'contract_name'
+    # căutarea după nume (pickere / autocomplete) folosește indexurile trigram de mai jos
+    _rec_names_search = ['contract_name', 'contract_number', 'supplier_name']
 
     implementation_id = fields.Many2one(
         'project.implementation',
@@ -25,9 +29,9 @@ class ProjectContract(models.Model):
         readonly=True,
     )
 
-    contract_name = fields.Char(string='Denumire contract', required=True, index=True)
+    contract_name = fields.Char(string='Denumire contract', required=True, index='trigram')
 
-    contract_number = fields.Char(string='Număr contract', required=True, index=True)
+    contract_number = fields.Char(string='Număr contract', required=True, index='trigram')
     contract_date = fields.Date(string='Data contract', required=True)
 
     contract_type = fields.Selection(
@@ -65,7 +69,7 @@ class ProjectContract(models.Model):
     seap_number = fields.Char(string='Număr SEAP')
     seap_date = fields.Date(string='Data SEAP')
 
-    supplier_name = fields.Char(string='Denumire furnizor')
+    supplier_name = fields.Char(string='Denumire furnizor', index='trigram')
 
     start_date = fields.Date(string='Data început')
     end_date = fields.Date(string='Data finalizare')
@@ -99,25 +103,26 @@ class ProjectContract(models.Model):
         copy=True,
     )
 
+    # totaluri stocate, întreținute din liniile de contract (sortare / grupare / pivot în SQL)
     amount_base_total = fields.Monetary(
         string='Total bază',
         currency_field='currency_id',
         compute='_compute_totals',
-        store=False,
+        store=True,
         readonly=True,
     )
     amount_vat_total = fields.Monetary(
         string='Total TVA',
         currency_field='currency_id',
         compute='_compute_totals',
-        store=False,
+        store=True,
         readonly=True,
     )
     amount_total = fields.Monetary(
         string='Total contract',
         currency_field='currency_id',
         compute='_compute_totals',
-        store=False,
+        store=True,
         readonly=True,
     )
 
@@ -128,6 +133,40 @@ class ProjectContract(models.Model):
             rec.amount_vat_total = sum(rec.line_ids.mapped('vat_amount'))
             rec.amount_total = sum(rec.line_ids.mapped('total_amount'))
 
+    # ----------------------------
+    # Ledger documente: total consumat din contract (folosit de plafonul documentelor)
+    # ----------------------------
+    document_line_ids = fields.One2many(
+        'project.document.line',
+        'contract_id',
+        string='Linii document',
+        readonly=True,
+    )
+
+    documents_amount_total = fields.Monetary(
+        string='Total documente',
+        currency_field='currency_id',
+        compute='_compute_documents_amount_total',
+        store=True,
+        readonly=True,
+    )
+
+    @api.depends('document_line_ids.total_amount')
+    def _compute_documents_amount_total(self):
+        # un singur SUM grupat pe contract; nu încărcăm istoricul de linii în Python
+        groups = self.env['project.document.line']._read_group(
+            [('contract_id', 'in', [i for i in self._origin.ids if i])],
+            ['contract_id'],
+            ['total_amount:sum'],
+        )
+        totals = {contract.id: amount for contract, amount in groups}
+        for rec in self:
+            rec.documents_amount_total = totals.get(rec._origin.id, 0.0) or 0.0
+
+    def _lock_documents_ledger(self):
+        """Blochează rândurile de contract înainte de verificarea plafonului."""
+        self.env['project.implementation.totals']._lock_ledger_rows('project.contract', self.ids)
+
     @api.constrains('activity_id', 'acquisition_id')
     def _check_funding_refs_belong_to_project(self):
         for rec in self:
@@ -230,6 +269,16 @@ class ProjectContractLine(models.Model):
     _order = 'id'
     _rec_name = 'name'
 
+    # unicitatea (contract, linie deviz) e garantată de index, fără interogare per linie
+    _sql_constraints = [
+        (
+            'uniq_contract_budget_proxy_line',
+            'unique(contract_id, budget_proxy_line_id)',
+            'În acest contract există deja o linie pentru devizul selectat. '
+            'Nu puteți adăuga aceeași linie de deviz de două ori.',
+        )
+    ]
+
     contract_id = fields.Many2one(
         'project.contract',
         string='Contract',
@@ -242,8 +291,9 @@ class ProjectContractLine(models.Model):
         'project.implementation',
         string='Implementare',
         related='contract_id.implementation_id',
-        store=False,
+        store=True,
         readonly=True,
+        index=True,
     )
 
     currency_id = fields.Many2one(
@@ -282,6 +332,14 @@ class ProjectContractLine(models.Model):
 
     name = fields.Char(string='Denumire')
 
+    # invers pentru dependențele agregatelor stocate pe linia de deviz
+    document_line_ids = fields.One2many(
+        'project.document.line',
+        'contract_line_id',
+        string='Linii document',
+        readonly=True,
+    )
+
     @api.depends('base_amount', 'vat_amount')
     def _compute_amounts(self):
         for rec in self:
@@ -320,27 +378,63 @@ class ProjectContractLine(models.Model):
             if not rec.contract_id:
                 raise ValidationError(_("Linia de contract trebuie să fie asociată unui contract."))
 
-    @api.constrains('contract_id', 'budget_proxy_line_id')
-    def _check_unique_budget_proxy_line_per_contract(self):
-        for rec in self:
-            if not rec.contract_id or not rec.budget_proxy_line_id:
-                continue
-
-            dup_count = self.search_count([
-                ('id', '!=', rec.id),
-                ('contract_id', '=', rec.contract_id.id),
-                ('budget_proxy_line_id', '=', rec.budget_proxy_line_id.id),
-            ])
-            if dup_count:
-                raise ValidationError(_(
-                    "În acest contract există deja o linie pentru devizul selectat (%s). "
-                    "Nu puteți adăuga aceeași linie de deviz de două ori."
-                ) % (rec.budget_proxy_line_id.display_name,))
+    def _precheck_unique_budget_proxy_line(self, pairs, exclude_ids=()):
+        """Verificare înainte de INSERT/UPDATE, cu mesajul prietenos (numele liniei de deviz).
+
+        `pairs` = [(contract_id, budget_proxy_line_id)] care vor exista după scriere. Un singur
+        search pentru tot lotul; garanția sub concurență rămâne indexul unic.
+        """
+        pairs = [(c, b) for c, b in pairs if c and b]
+        if not pairs:
+            return
+
+        duplicate = next((pair for pair, cnt in Counter(pairs).items() if cnt > 1), None)
+        if not duplicate:
+            existing = self.search_fetch([
+                ('contract_id', 'in', list({c for c, _b in pairs})),
+                ('budget_proxy_line_id', 'in', list({b for _c, b in pairs})),
+                ('id', 'not in', list(exclude_ids)),
+            ], ['contract_id', 'budget_proxy_line_id'])
+            wanted = set(pairs)
+            duplicate = next((
+                (line.contract_id.id, line.budget_proxy_line_id.id)
+                for line in existing
+                if (line.contract_id.id, line.budget_proxy_line_id.id) in wanted
+            ), None)
+
+        if duplicate:
+            budget_line = self.env['project.implementation.budget.line'].browse(duplicate[1])
+            raise ValidationError(_(
+                "În acest contract există deja o linie pentru devizul selectat (%s). "
+                "Nu puteți adăuga aceeași linie de deviz de două ori."
+            ) % (budget_line.display_name,))
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        self._precheck_unique_budget_proxy_line([
+            (vals.get('contract_id'), vals.get('budget_proxy_line_id')) for vals in vals_list
+        ])
+        return super().create(vals_list)
+
+    def write(self, vals):
+        if 'contract_id' in vals or 'budget_proxy_line_id' in vals:
+            self._precheck_unique_budget_proxy_line([
+                (
+                    vals.get('contract_id', rec.contract_id.id),
+                    vals.get('budget_proxy_line_id', rec.budget_proxy_line_id.id),
+                )
+                for rec in self
+            ], exclude_ids=self.ids)
+        return super().write(vals)
 
     def unlink(self):
-        DocumentLine = self.env['project.document.line']
+        counts = dict(self.env['project.document.line']._read_group(
+            [('contract_line_id', 'in', self.ids)],
+            ['contract_line_id'],
+            ['__count'],
+        ))
         for rec in self:
-            cnt = DocumentLine.search_count([('contract_line_id', '=', rec.id)])
+            cnt = counts.get(rec, 0)
             if cnt:
                 raise ValidationError(_(
                     "Nu puteți șterge linia de contract deoarece există linii de document care o referă.\n\n"
@@ -0,0 +1,349 @@
+# -*- coding: utf-8 -*-
+import base64
+import csv
+import datetime
+import io
+import logging
+from collections import defaultdict
+
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError
+
+_logger = logging.getLogger(__name__)
+
+# coloane antet contract (repetate pe fiecare rând al aceluiași contract)
+CONTRACT_COLUMNS = [
+    'contract_number', 'contract_name', 'contract_date', 'supplier_name',
+    'contract_type', 'procedure_type', 'award_state',
+    'seap_number', 'seap_date', 'start_date', 'end_date',
+]
+# coloane rezolvate prin hărți de căutare (cod sau denumire)
+LOOKUP_COLUMNS = ['activity', 'acquisition', 'budget_line']
+# coloane linie contract
+LINE_COLUMNS = ['line_name', 'base_amount', 'vat_rate', 'vat_amount']
+
+REQUIRED_COLUMNS = ['contract_number', 'contract_date', 'budget_line', 'base_amount']
+
+DATE_FORMATS = ('%Y-%m-%d', '%d.%m.%Y', '%d/%m/%Y')
+
+
+def _norm(value):
+    """Cheie de potrivire: fără spații multiple, fără diferențe de majuscule."""
+    if value is None or value is False:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return ' '.join(str(value).split()).casefold()
+
+
+def _to_date(value):
+    if value in (None, ''):
+        return False
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    text = str(value).strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError("dată invalidă: %s" % text)
+
+
+def _to_float(value):
+    if value in (None, ''):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip().replace(' ', '')
+    if ',' in text and '.' in text:
+        text = text.replace('.', '').replace(',', '.')
+    else:
+        text = text.replace(',', '.')
+    try:
+        return float(text)
+    except ValueError:
+        raise ValueError("număr invalid: %s" % value)
+
+
+class ProjectContractImportWizard(models.TransientModel):
+    _name = 'project.contract.import.wizard'
+    _description = 'Import contracte din XLSX / CSV'
+
+    implementation_id = fields.Many2one('project.implementation', string='Implementare', required=True, readonly=True)
+
+    upload = fields.Binary(string='Fișier XLSX / CSV', required=True, attachment=False)
+    upload_filename = fields.Char(string='Nume fișier')
+
+    state = fields.Selection([
+        ('draft', 'Încărcare'),
+        ('preview', 'Verificare'),
+        ('done', 'Importat'),
+    ], string='Stare', default='draft', readonly=True)
+
+    report = fields.Text(string='Raport', readonly=True)
+    contract_count = fields.Integer(string='Contracte', readonly=True)
+    line_count = fields.Integer(string='Linii contract', readonly=True)
+    error_count = fields.Integer(string='Erori', readonly=True)
+
+    # ----------------------------
+    # Citire fișier (streaming, rând cu rând)
+    # ----------------------------
+    def _iter_rows(self):
+        """Rândurile fișierului ca tupluri de valori; primul rând este antetul."""
+        data = base64.b64decode(self.upload or b'')
+        filename = (self.upload_filename or '').lower()
+
+        if filename.endswith('.csv'):
+            text = io.TextIOWrapper(io.BytesIO(data), encoding='utf-8-sig', newline='')
+            sample = text.read(4096)
+            text.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=';,\t')
+            except csv.Error:
+                dialect = csv.excel
+            yield from csv.reader(text, dialect)
+            return
+
+        try:
+            import openpyxl
+        except ImportError as e:
+            raise ValidationError(_(
+                "Lipsește librăria Python 'openpyxl'.\n"
+                "Instalează pachetul 'openpyxl' pe server sau importă fișierul ca CSV."
+            )) from e
+
+        workbook = openpyxl.load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+        try:
+            yield from workbook.worksheets[0].iter_rows(values_only=True)
+        finally:
+            workbook.close()
+
+    def _header_aliases(self):
+        """Antet acceptat: numele tehnic al coloanei sau eticheta câmpului din formular."""
+        Contract = self.env['project.contract']
+        ContractLine = self.env['project.contract.line']
+        aliases = {}
+        for column in CONTRACT_COLUMNS:
+            aliases[_norm(column)] = column
+            aliases[_norm(Contract._fields[column].string)] = column
+        for column, label in (
+            ('activity', Contract._fields['activity_id'].string),
+            ('acquisition', Contract._fields['acquisition_id'].string),
+            ('budget_line', ContractLine._fields['budget_proxy_line_id'].string),
+            ('line_name', ContractLine._fields['name'].string),
+            ('base_amount', ContractLine._fields['base_amount'].string),
+            ('vat_rate', ContractLine._fields['vat_rate'].string),
+            ('vat_amount', ContractLine._fields['vat_amount'].string),
+        ):
+            aliases[_norm(column)] = column
+            aliases[_norm(label)] = column
+        return aliases
+
+    # ----------------------------
+    # Hărți de căutare (o singură citire pe model)
+    # ----------------------------
+    @api.model
+    def _unique_map(self, records, key_fnames):
+        """{cheie normalizată: record}; cheile care indică mai multe înregistrări devin None (ambigue)."""
+        result = {}
+        for rec in records:
+            for fname in key_fnames:
+                key = _norm(rec[fname])
+                if not key:
+                    continue
+                if key in result and result[key] != rec:
+                    result[key] = None
+                else:
+                    result[key] = rec
+        return result
+
+    def _build_lookup_maps(self):
+        impl = self.implementation_id
+        funding_domain = [('project_id', '=', impl.funding_project_id.id)]
+
+        Activity = self.env['project.activity']
+        activity_keys = [f for f in ('code', 'name') if f in Activity._fields]
+        Acquisition = self.env['project.acquisition']
+        acquisition_keys = [f for f in ('code', 'name') if f in Acquisition._fields]
+
+        return {
+            'activity': self._unique_map(Activity.search_fetch(funding_domain, activity_keys), activity_keys),
+            'acquisition': self._unique_map(Acquisition.search_fetch(funding_domain, acquisition_keys), acquisition_keys),
+            'budget_line': self._unique_map(
+                self.env['project.implementation.budget.line'].search_fetch(
+                    [('implementation_id', '=', impl.id)], ['subchapter', 'name'],
+                ),
+                ['subchapter', 'name'],
+            ),
+            'existing_numbers': {
+                _norm(contract.contract_number)
+                for contract in self.env['project.contract'].search_fetch(
+                    [('implementation_id', '=', impl.id)], ['contract_number'],
+                )
+            },
+        }
+
+    @api.model
+    def _selection_value(self, fname, value):
+        """Valoarea de selecție după cheie sau după etichetă."""
+        if not _norm(value):
+            return False
+        field = self.env['project.contract']._fields[fname]
+        for key, label in field._description_selection(self.env):
+            if _norm(value) in (_norm(key), _norm(label)):
+                return key
+        raise ValueError("valoare necunoscută pentru %s: %s" % (field.string, value))
+
+    # ----------------------------
+    # Pregătire (dry-run și import folosesc același cod)
+    # ----------------------------
+    def _prepare_import(self):
+        """(vals_list contracte cu linii, raport, număr erori); nu scrie nimic."""
+        self.ensure_one()
+        rows = self._iter_rows()
+        header = next(rows, None)
+        if not header:
+            raise ValidationError(_("Fișierul este gol."))
+
+        aliases = self._header_aliases()
+        columns = [aliases.get(_norm(cell)) for cell in header]
+        missing = [c for c in REQUIRED_COLUMNS if c not in columns]
+        if missing:
+            raise ValidationError(_("Lipsesc coloanele obligatorii: %s") % ", ".join(missing))
+
+        maps = self._build_lookup_maps()
+        contracts = {}
+        budget_lines_seen = defaultdict(set)
+        errors = []
+
+        for row_number, row in enumerate(rows, start=2):
+            values = {col: value for col, value in zip(columns, row) if col}
+            if not any(_norm(v) for v in values.values()):
+                continue
+
+            try:
+                number = str(values.get('contract_number') or '').strip()
+                if not number:
+                    raise ValueError("lipsește numărul contractului")
+                key = _norm(number)
+                if key in maps['existing_numbers']:
+                    raise ValueError("contractul %s există deja în implementare" % number)
+
+                refs = {}
+                for column in LOOKUP_COLUMNS:
+                    if not _norm(values.get(column)):
+                        refs[column] = False
+                        continue
+                    rec = maps[column].get(_norm(values.get(column)))
+                    if rec is None:
+                        raise ValueError("%s inexistent sau ambiguu: %s" % (column, values.get(column)))
+                    refs[column] = rec.id
+                if not refs['budget_line']:
+                    raise ValueError("lipsește linia de deviz")
+                if refs['budget_line'] in budget_lines_seen[key]:
+                    raise ValueError("linia de deviz %s apare de două ori în contractul %s" % (
+                        values.get('budget_line'), number))
+
+                base = _to_float(values.get('base_amount'))
+                if base is None:
+                    raise ValueError("lipsește baza")
+                vat_rate = _to_float(values.get('vat_rate'))
+                vat_rate = 21.0 if vat_rate is None else vat_rate
+                vat_amount = _to_float(values.get('vat_amount'))
+                line_vals = {
+                    'budget_proxy_line_id': refs['budget_line'],
+                    'name': str(values.get('line_name') or '').strip() or False,
+                    'base_amount': base,
+                    'vat_rate': vat_rate,
+                    'vat_amount': round(base * vat_rate / 100.0, 2) if vat_amount is None else vat_amount,
+                    'vat_manual': vat_amount is not None,
+                }
+
+                if key not in contracts:
+                    contract_date = _to_date(values.get('contract_date'))
+                    if not contract_date:
+                        raise ValueError("lipsește data contractului")
+                    contracts[key] = {
+                        'implementation_id': self.implementation_id.id,
+                        'contract_number': number,
+                        'contract_name': str(values.get('contract_name') or '').strip() or number,
+                        'contract_date': contract_date,
+                        'supplier_name': str(values.get('supplier_name') or '').strip() or False,
+                        'contract_type': self._selection_value('contract_type', values.get('contract_type')),
+                        'procedure_type': self._selection_value('procedure_type', values.get('procedure_type')),
+                        'award_state': self._selection_value('award_state', values.get('award_state')) or 'draft',
+                        'seap_number': str(values.get('seap_number') or '').strip() or False,
+                        'seap_date': _to_date(values.get('seap_date')),
+                        'start_date': _to_date(values.get('start_date')),
+                        'end_date': _to_date(values.get('end_date')),
+                        'activity_id': refs['activity'],
+                        'acquisition_id': refs['acquisition'],
+                        'line_ids': [],
+                    }
+            except ValueError as exc:
+                errors.append(_("Rând %(row)s: %(reason)s") % {'row': row_number, 'reason': exc})
+                continue
+
+            budget_lines_seen[key].add(refs['budget_line'])
+            contracts[key]['line_ids'].append(fields.Command.create(line_vals))
+
+        vals_list = list(contracts.values())
+        line_count = sum(len(vals['line_ids']) for vals in vals_list)
+        report = errors + [
+            _("OK  %(number)s: %(cnt)s linii") % {'number': vals['contract_number'], 'cnt': len(vals['line_ids'])}
+            for vals in vals_list
+        ]
+        return vals_list, line_count, report, len(errors)
+
+    def _reopen(self):
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Import contracte'),
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+    # ----------------------------
+    # Acțiuni
+    # ----------------------------
+    def action_preview(self):
+        """Dry-run: validează tot fișierul și afișează raportul, fără scrieri."""
+        self.ensure_one()
+        vals_list, line_count, report, error_count = self._prepare_import()
+        self.write({
+            'state': 'preview',
+            'report': "\n".join(report) or _("Niciun rând de importat."),
+            'contract_count': len(vals_list),
+            'line_count': line_count,
+            'error_count': error_count,
+        })
+        return self._reopen()
+
+    def action_import(self):
+        """Creează toate contractele (cu linii) într-un singur create(); tot sau nimic."""
+        self.ensure_one()
+        vals_list, line_count, report, error_count = self._prepare_import()
+        if error_count:
+            raise ValidationError(_(
+                "Fișierul are %s erori; nu s-a importat nimic.\n\n%s"
+            ) % (error_count, "\n".join(report[:error_count][:50])))
+
+        contracts = self.env['project.contract'].create(vals_list)
+
+        _logger.info(
+            "Import contracte impl=%s: %s contracte, %s linii",
+            self.implementation_id.id, len(contracts), line_count,
+        )
+        self.write({
+            'state': 'done',
+            'report': "\n".join(report),
+            'contract_count': len(contracts),
+            'line_count': line_count,
+            'error_count': 0,
+        })
+        return self._reopen()
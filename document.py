@@ -10,6 +10,8 @@ class ProjectDocument(models.Model):
     _name = 'project.document'
     _description = 'Document proiect'
     _order = 'document_date desc, id desc'
+    # căutarea după nume (pickere / autocomplete) folosește indexurile trigram de mai jos
+    _rec_names_search = ['document_number', 'issuer_name']
 
     implementation_id = fields.Many2one(
         'project.implementation',
@@ -44,10 +46,10 @@ class ProjectDocument(models.Model):
         index=True,
     )
 
-    document_number = fields.Char(string='Număr document', required=True, index=True)
+    document_number = fields.Char(string='Număr document', required=True, index='trigram')
     document_date = fields.Date(string='Data document', required=True)
 
-    issuer_name = fields.Char(string='Furnizor/Emitent')
+    issuer_name = fields.Char(string='Furnizor/Emitent', index='trigram')
     notes = fields.Text(string='Observații')
 
     currency_id = fields.Many2one(
@@ -65,39 +67,40 @@ class ProjectDocument(models.Model):
         copy=True,
     )
 
+    # totaluri stocate, întreținute din linii (liste sortabile / grupabile după valoare)
     amount_elig_base_total = fields.Monetary(
         string='Total bază eligibil',
         currency_field='currency_id',
         compute='_compute_totals',
-        store=False,
+        store=True,
         readonly=True,
     )
     amount_elig_vat_total = fields.Monetary(
         string='Total TVA eligibil',
         currency_field='currency_id',
         compute='_compute_totals',
-        store=False,
+        store=True,
         readonly=True,
     )
     amount_neelig_base_total = fields.Monetary(
         string='Total bază neeligibil',
         currency_field='currency_id',
         compute='_compute_totals',
-        store=False,
+        store=True,
         readonly=True,
     )
     amount_neelig_vat_total = fields.Monetary(
         string='Total TVA neeligibil',
         currency_field='currency_id',
         compute='_compute_totals',
-        store=False,
+        store=True,
         readonly=True,
     )
     amount_total = fields.Monetary(
         string='Total document',
         currency_field='currency_id',
         compute='_compute_totals',
-        store=False,
+        store=True,
         readonly=True,
     )
 
@@ -193,25 +196,19 @@ class ProjectDocument(models.Model):
     def _get_contract_total_amount(self, contract):
         if not contract:
             return 0.0
-        return sum(contract.line_ids.mapped('total_amount'))
+        return contract.amount_total or 0.0
 
     def _compute_contract_ceiling_sums(self):
+        """Compară ledger-ul contractului (total documente, stocat) cu totalul contractului (stocat)."""
         self.ensure_one()
 
-        current_total = sum(self.line_ids.mapped('total_amount')) if self.line_ids else 0.0
+        current_total = self.amount_total or 0.0
 
-        other_total = 0.0
+        grand_total = current_total
         if self.contract_id and self.implementation_id:
-            other_docs = self.search([
-                ('id', '!=', self.id),
-                ('implementation_id', '=', self.implementation_id.id),
-                ('contract_id', '=', self.contract_id.id),
-            ])
-            if other_docs:
-                other_lines = self.env['project.document.line'].search([('document_id', 'in', other_docs.ids)])
-                other_total = sum(other_lines.mapped('total_amount'))
+            grand_total = self.contract_id.documents_amount_total or 0.0
 
-        grand_total = current_total + other_total
+        other_total = grand_total - current_total
         contract_total = self._get_contract_total_amount(self.contract_id)
 
         return {
@@ -223,6 +220,13 @@ class ProjectDocument(models.Model):
         }
 
     def _enforce_contract_ceiling_if_needed(self, when):
+        # importurile în loturi amână plafonul și îl verifică o singură dată (_run_deferred_checks)
+        if self.env.context.get('defer_implementation_checks'):
+            return
+        if self.env.context.get('enforce_document_contract_ceiling'):
+            # toate contractele lotului, o singură dată și în ordinea id-urilor
+            self.filtered('implementation_id').contract_id._lock_documents_ledger()
+
         for rec in self:
             if not rec.env.context.get('enforce_document_contract_ceiling'):
                 continue
@@ -265,6 +269,10 @@ class ProjectDocument(models.Model):
                     'ct': sums['contract_total'],
                 })
 
+    def _run_deferred_checks(self):
+        """Plafonul contractului amânat cu `defer_implementation_checks`, o dată pe tot lotul."""
+        self.with_context(defer_implementation_checks=False)._enforce_contract_ceiling_if_needed(when='deferred')
+
     @api.model_create_multi
     def create(self, vals_list):
         recs = super().create(vals_list)
@@ -300,7 +308,9 @@ class ProjectDocumentLine(models.Model):
     _order = 'id'
     _rec_name = 'name'
 
-    name = fields.Char(string='Denumire', compute='_compute_name', store=True, readonly=True)
+    # numele stocat conține deja nr./dată/emitent, linia de contract și observațiile:
+    # o singură coloană cu index trigram pentru picker-ul din liniile de decontare
+    name = fields.Char(string='Denumire', compute='_compute_name', store=True, readonly=True, index='trigram')
 
     document_id = fields.Many2one(
         'project.document',
@@ -314,16 +324,18 @@ class ProjectDocumentLine(models.Model):
         'project.implementation',
         string='Implementare',
         related='document_id.implementation_id',
-        store=False,
+        store=True,
         readonly=True,
+        index=True,
     )
 
     contract_id = fields.Many2one(
         'project.contract',
         string='Contract',
         related='document_id.contract_id',
-        store=False,
+        store=True,
         readonly=True,
+        index=True,
     )
 
     currency_id = fields.Many2one(
@@ -346,8 +358,9 @@ class ProjectDocumentLine(models.Model):
         'project.implementation.budget.line',
         string='Linie deviz (din contract)',
         related='contract_line_id.budget_proxy_line_id',
-        store=False,
+        store=True,
         readonly=True,
+        index=True,
     )
 
     vat_rate = fields.Float(string='Cota TVA (%)', required=True, default=21.0)
@@ -384,34 +397,100 @@ class ProjectDocumentLine(models.Model):
 
     notes = fields.Char(string='Observații')
 
+    # invers pentru dependențele agregatelor stocate pe linia de deviz
+    settlement_line_ids = fields.One2many(
+        'project.settlement.line',
+        'document_line_id',
+        string='Linii decontare',
+        readonly=True,
+    )
+
+    # ----------------------------
+    # Decontat până acum / rămas de decontat (nerambursabil), stocate
+    # ----------------------------
+    settled_base = fields.Monetary(
+        string='Bază decontată',
+        currency_field='currency_id',
+        compute='_compute_settled_remaining',
+        store=True,
+        readonly=True,
+    )
+    settled_vat = fields.Monetary(
+        string='TVA decontat',
+        currency_field='currency_id',
+        compute='_compute_settled_remaining',
+        store=True,
+        readonly=True,
+    )
+    remaining_base = fields.Monetary(
+        string='Bază rămasă de decontat',
+        currency_field='currency_id',
+        compute='_compute_settled_remaining',
+        store=True,
+        readonly=True,
+        index=True,
+    )
+    remaining_vat = fields.Monetary(
+        string='TVA rămas de decontat',
+        currency_field='currency_id',
+        compute='_compute_settled_remaining',
+        store=True,
+        readonly=True,
+        index=True,
+    )
+
+    @api.depends(
+        'elig_base_amount',
+        'elig_vat_amount',
+        'settlement_line_ids.elig_base_amount',
+        'settlement_line_ids.elig_vat_amount',
+        'implementation_id.funding_project_id.aport_coef',
+    )
+    def _compute_settled_remaining(self):
+        # un singur GROUP BY pe linie document pentru tot recordset-ul
+        Totals = self.env['project.implementation.totals']
+        totals = Totals._settlement_totals_by_document_line([i for i in self._origin.ids if i])
+        funding = Totals._funding_snapshot(self.implementation_id.ids)
+        for rec in self:
+            settled_base, settled_vat = totals.get(rec._origin.id, (0.0, 0.0))
+            coef = funding.neramb_coef(rec.implementation_id.id)
+
+            rec.settled_base = settled_base
+            rec.settled_vat = settled_vat
+            rec.remaining_base = (rec.elig_base_amount or 0.0) * coef - settled_base
+            rec.remaining_vat = (rec.elig_vat_amount or 0.0) * coef - settled_vat
+
     @api.depends(
         'document_id.document_number',
         'document_id.document_date',
         'document_id.issuer_name',
         'contract_line_id',
+        'contract_line_id.name',
         'notes',
     )
     def _compute_name(self):
+        # etichetele se construiesc o singură dată per document / linie de contract,
+        # nu pentru fiecare linie (redenumirile ating sute de linii ale aceluiași antet)
+        header_by_doc = {}
+        for doc in self.document_id:
+            header_parts = [str(doc.document_number or _("(fără număr)"))]
+            if doc.document_date:
+                header_parts.append(str(doc.document_date))
+            if doc.issuer_name:
+                header_parts.append(str(doc.issuer_name))
+            header_by_doc[doc.id] = " / ".join(header_parts)
+
+        label_by_contract_line = {cl.id: cl.display_name for cl in self.contract_line_id}
+
         for rec in self:
-            doc = rec.document_id
-            if not doc:
+            header = header_by_doc.get(rec.document_id.id)
+            if header is None:
                 rec.name = _("Linie %s") % rec.id
                 continue
 
-            nr = doc.document_number or _("(fără număr)")
-            dt = doc.document_date or ''
-            furn = doc.issuer_name or ''
-
-            header_parts = [str(nr)]
-            if dt:
-                header_parts.append(str(dt))
-            if furn:
-                header_parts.append(str(furn))
-            header = " / ".join(header_parts)
-
             line_parts = []
             if rec.contract_line_id:
-                line_parts.append(rec.contract_line_id.display_name)
+                line_parts.append(label_by_contract_line[rec.contract_line_id.id])
             if rec.notes:
                 line_parts.append(rec.notes)
 
@@ -425,11 +504,8 @@ class ProjectDocumentLine(models.Model):
     def name_search(self, name="", args=None, operator="ilike", limit=100):
         args = args or []
         if name:
-            args = ['|', '|', '|',
-                    ('document_id.document_number', operator, name),
-                    ('document_id.issuer_name', operator, name),
-                    ('notes', operator, name),
-                    ('contract_line_id', operator, name)] + args
+            # fără join-uri: filtrul rulează pe project_document_line.name (index trigram), apoi LIMIT
+            args = [('name', operator, name)] + args
         recs = self.search(args, limit=limit)
         return recs.name_get()
 
@@ -499,9 +575,13 @@ class ProjectDocumentLine(models.Model):
 
     # Blocăm ștergerea liniei dacă există decontări care o referă
     def unlink(self):
-        SettlementLine = self.env['project.settlement.line']
+        counts = dict(self.env['project.settlement.line']._read_group(
+            [('document_line_id', 'in', self.ids)],
+            ['document_line_id'],
+            ['__count'],
+        ))
         for rec in self:
-            cnt = SettlementLine.search_count([('document_line_id', '=', rec.id)])
+            cnt = counts.get(rec, 0)
             if cnt:
                 raise ValidationError(_(
                     "Nu puteți șterge linia de document deoarece există linii de decontare care o referă.\n\n"
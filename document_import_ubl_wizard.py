@@ -0,0 +1,398 @@
+# -*- coding: utf-8 -*-
+import datetime
+import io
+import logging
+import zipfile
+from collections import defaultdict
+
+from lxml import etree
+
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError
+
+_logger = logging.getLogger(__name__)
+
+UBL_NS = {
+    'cbc': 'urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2',
+    'cac': 'urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2',
+}
+
+# câte documente (cu liniile lor) se creează într-un singur apel create()
+IMPORT_BATCH_SIZE = 200
+
+# limite pentru arhive ZIP (dimensiuni necomprimate, din antetul fiecărui membru): o arhivă
+# mică nu poate umfla memoria worker-ului („zip bomb”)
+ZIP_MAX_MEMBERS = 5000
+ZIP_MAX_MEMBER_SIZE = 20 * 1024 * 1024
+ZIP_MAX_TOTAL_SIZE = 512 * 1024 * 1024
+
+
+# ----------------------------
+# Parsare UBL (e-Factura)
+# ----------------------------
+def _norm(value):
+    """Cheie de potrivire: fără spații multiple, fără diferențe de majuscule."""
+    return ' '.join((value or '').split()).casefold()
+
+
+def _ubl_text(node, path):
+    return (node.findtext(path, namespaces=UBL_NS) or '').strip()
+
+
+def _ubl_float(node, path):
+    value = _ubl_text(node, path)
+    try:
+        return float(value) if value else 0.0
+    except ValueError:
+        return 0.0
+
+
+def _ubl_date(node, path):
+    value = _ubl_text(node, path)
+    if not value:
+        return None
+    try:
+        return datetime.date.fromisoformat(value[:10])
+    except ValueError:
+        raise ValueError("dată invalidă: %s" % value)
+
+
+def _parse_ubl_invoice(stream):
+    """Extrage antetul și liniile unei facturi UBL 2.1 (CIUS-RO).
+
+    Parserul nu rezolvă entități și nu accesează rețeaua (XML primit din exterior).
+    """
+    parser = etree.XMLParser(resolve_entities=False, no_network=True, remove_comments=True)
+    root = etree.parse(stream, parser).getroot()
+
+    kind = etree.QName(root).localname
+    if kind == 'CreditNote':
+        # nu există tip de document „notă de credit”; se înregistrează manual
+        raise ValueError("notele de credit (CreditNote) nu se importă automat")
+    if kind != 'Invoice':
+        raise ValueError("nu este factură UBL (<%s>)" % kind)
+
+    supplier_path = 'cac:AccountingSupplierParty/cac:Party/'
+    supplier = (
+        _ubl_text(root, supplier_path + 'cac:PartyLegalEntity/cbc:RegistrationName')
+        or _ubl_text(root, supplier_path + 'cac:PartyName/cbc:Name')
+    )
+
+    lines = []
+    for line in root.iterfind('cac:InvoiceLine', namespaces=UBL_NS):
+        lines.append({
+            'name': _ubl_text(line, 'cac:Item/cbc:Name'),
+            'base': _ubl_float(line, 'cbc:LineExtensionAmount'),
+            'vat_rate': _ubl_float(line, 'cac:Item/cac:ClassifiedTaxCategory/cbc:Percent'),
+        })
+
+    return {
+        'number': _ubl_text(root, 'cbc:ID'),
+        'date': _ubl_date(root, 'cbc:IssueDate'),
+        'supplier': supplier,
+        'contract_number': _ubl_text(root, 'cac:ContractDocumentReference/cbc:ID'),
+        'lines': lines,
+    }
+
+
+class ProjectDocumentImportUblWizard(models.TransientModel):
+    _name = 'project.document.import.ubl.wizard'
+    _description = 'Import documente din e-Factura (UBL XML)'
+
+    implementation_id = fields.Many2one('project.implementation', string='Implementare', required=True, readonly=True)
+
+    upload = fields.Binary(string='Fișier XML / ZIP', required=True, attachment=True)
+    upload_filename = fields.Char(string='Nume fișier')
+
+    state = fields.Selection([
+        ('draft', 'Încărcare'),
+        ('preview', 'Verificare'),
+        ('done', 'Importat'),
+    ], string='Stare', default='draft', readonly=True)
+
+    report = fields.Text(string='Raport', readonly=True)
+    matched_count = fields.Integer(string='Facturi potrivite', readonly=True)
+    skipped_count = fields.Integer(string='Facturi respinse', readonly=True)
+    created_count = fields.Integer(string='Documente create', readonly=True)
+
+    # ----------------------------
+    # Citire fișiere
+    # ----------------------------
+    def _get_upload_attachment(self):
+        return self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_field', '=', 'upload'),
+            ('res_id', '=', self.id),
+        ], limit=1)
+
+    def _open_upload(self):
+        """Fișierul încărcat, deschis din filestore (fără decodare base64 în memorie)."""
+        attachment = self._get_upload_attachment()
+        if attachment.store_fname:
+            return open(attachment._full_path(attachment.store_fname), 'rb')
+        return io.BytesIO(attachment.raw or b'')
+
+    def _check_zip_limits(self, members):
+        if len(members) > ZIP_MAX_MEMBERS:
+            raise ValidationError(_(
+                "Arhiva conține %(count)s fișiere XML; maximum %(max)s pe import."
+            ) % {'count': len(members), 'max': ZIP_MAX_MEMBERS})
+        for info in members:
+            if info.file_size > ZIP_MAX_MEMBER_SIZE:
+                raise ValidationError(_(
+                    "Fișierul %(file)s din arhivă are %(size)s MB necomprimat; maximum %(max)s MB."
+                ) % {
+                    'file': info.filename,
+                    'size': info.file_size // (1024 * 1024),
+                    'max': ZIP_MAX_MEMBER_SIZE // (1024 * 1024),
+                })
+        if sum(info.file_size for info in members) > ZIP_MAX_TOTAL_SIZE:
+            raise ValidationError(_(
+                "Arhiva are peste %s MB necomprimat; împarte-o în mai multe importuri."
+            ) % (ZIP_MAX_TOTAL_SIZE // (1024 * 1024)))
+
+    def _iter_xml_payloads(self):
+        """(nume fișier, stream) pentru fiecare XML; arhiva ZIP e citită membru cu membru.
+
+        Limitele se verifică pe antetul arhivei înainte de a decomprima ceva; ZipExtFile nu
+        întoarce mai mult decât dimensiunea declarată a membrului.
+        """
+        filename = self.upload_filename or 'factura.xml'
+        with self._open_upload() as upload:
+            if not zipfile.is_zipfile(upload):
+                upload.seek(0)
+                yield filename, upload
+                return
+
+            upload.seek(0)
+            with zipfile.ZipFile(upload) as archive:
+                members = [
+                    info for info in archive.infolist()
+                    if not info.is_dir() and info.filename.lower().endswith('.xml')
+                ]
+                self._check_zip_limits(members)
+                for info in members:
+                    with archive.open(info) as stream:
+                        yield info.filename, stream
+
+    # ----------------------------
+    # Hărți de potrivire (o singură citire pe implementare)
+    # ----------------------------
+    def _build_match_maps(self):
+        impl_id = self.implementation_id.id
+
+        contracts = self.env['project.contract'].search_fetch(
+            [('implementation_id', '=', impl_id)],
+            ['contract_number', 'supplier_name', 'documents_amount_total', 'amount_total'],
+        )
+        by_number = defaultdict(list)
+        by_supplier = defaultdict(list)
+        # plafon contract: [consumat de documente, total contract], actualizat pe măsură ce acceptăm facturi
+        ledger = {}
+        for contract in contracts:
+            ledger[contract.id] = [contract.documents_amount_total or 0.0, contract.amount_total or 0.0]
+            by_number[_norm(contract.contract_number)].append(contract)
+            if contract.supplier_name:
+                by_supplier[_norm(contract.supplier_name)].append(contract)
+
+        lines_by_contract = defaultdict(list)
+        for line in self.env['project.contract.line'].search_fetch(
+            [('contract_id', 'in', contracts.ids)],
+            ['contract_id', 'name'],
+        ):
+            lines_by_contract[line.contract_id.id].append(line)
+
+        existing = {
+            (doc.contract_id.id, _norm(doc.document_number))
+            for doc in self.env['project.document'].search_fetch(
+                [('implementation_id', '=', impl_id)],
+                ['contract_id', 'document_number'],
+            )
+        }
+        return {
+            'by_number': by_number,
+            'by_supplier': by_supplier,
+            'lines_by_contract': lines_by_contract,
+            'existing': existing,
+            'ledger': ledger,
+        }
+
+    @api.model
+    def _match_contract(self, invoice, maps):
+        """Contractul facturii: după numărul de contract din UBL, departajat de furnizor."""
+        supplier = _norm(invoice['supplier'])
+
+        if invoice['contract_number']:
+            candidates = maps['by_number'].get(_norm(invoice['contract_number']), [])
+            if len(candidates) > 1 and supplier:
+                candidates = [c for c in candidates if _norm(c.supplier_name) == supplier]
+            if len(candidates) == 1:
+                return candidates[0], None
+            if not candidates:
+                return None, _("contractul %s nu există în implementare") % invoice['contract_number']
+            return None, _("numărul de contract %s este ambiguu") % invoice['contract_number']
+
+        candidates = maps['by_supplier'].get(supplier, []) if supplier else []
+        if len(candidates) == 1:
+            return candidates[0], None
+        if not candidates:
+            return None, _("fără referință de contract și furnizor necunoscut (%s)") % (invoice['supplier'] or '-')
+        return None, _("fără referință de contract, iar furnizorul %s are mai multe contracte") % invoice['supplier']
+
+    @api.model
+    def _match_contract_line(self, contract_lines, item_name):
+        """Linia de contract: unica linie a contractului sau cea cu aceeași denumire ca articolul."""
+        if len(contract_lines) == 1:
+            return contract_lines[0]
+        wanted = _norm(item_name)
+        matches = [line for line in contract_lines if wanted and _norm(line.name) == wanted]
+        return matches[0] if len(matches) == 1 else None
+
+    # ----------------------------
+    # Pregătire (dry-run și import folosesc același cod)
+    # ----------------------------
+    def _prepare_import(self):
+        self.ensure_one()
+        maps = self._build_match_maps()
+        vals_list = []
+        report = []
+        skipped = 0
+
+        for filename, stream in self._iter_xml_payloads():
+            try:
+                invoice = _parse_ubl_invoice(stream)
+            except (etree.XMLSyntaxError, ValueError) as exc:
+                skipped += 1
+                report.append(_("RESPINS  %(file)s: %(reason)s") % {'file': filename, 'reason': exc})
+                continue
+
+            label = "%s / %s" % (filename, invoice['number'] or '-')
+            contract, error = self._match_contract(invoice, maps)
+            document_date = invoice['date']
+
+            if not error and not invoice['number']:
+                error = _("factura nu are număr (cbc:ID)")
+            if not error and not document_date:
+                error = _("factura nu are dată (cbc:IssueDate)")
+            if not error and not invoice['lines']:
+                error = _("factura nu are linii")
+            if not error and (contract.id, _norm(invoice['number'])) in maps['existing']:
+                error = _("documentul există deja pe contractul %s") % contract.contract_number
+
+            line_commands = []
+            document_total = 0.0
+            if not error:
+                contract_lines = maps['lines_by_contract'].get(contract.id, [])
+                for line in invoice['lines']:
+                    contract_line = self._match_contract_line(contract_lines, line['name'])
+                    if not contract_line:
+                        error = _("articolul „%s” nu poate fi asociat unei linii din contractul %s") % (
+                            line['name'] or '-', contract.contract_number,
+                        )
+                        break
+                    vat = round(line['base'] * line['vat_rate'] / 100.0, 2)
+                    document_total += line['base'] + vat
+                    line_commands.append(fields.Command.create({
+                        'contract_line_id': contract_line.id,
+                        'vat_rate': line['vat_rate'],
+                        'elig_base_amount': line['base'],
+                        'elig_vat_amount': vat,
+                        'notes': line['name'],
+                    }))
+
+            if not error:
+                # același plafon ca la salvarea din formular (enforce_document_contract_ceiling)
+                consumed, contract_total = maps['ledger'][contract.id]
+                if consumed + document_total > contract_total + 0.0001:
+                    error = _(
+                        "depășește totalul contractului %(contract)s "
+                        "(documente %(consumed).2f + factură %(doc).2f > contract %(total).2f)"
+                    ) % {
+                        'contract': contract.contract_number,
+                        'consumed': consumed,
+                        'doc': document_total,
+                        'total': contract_total,
+                    }
+
+            if error:
+                skipped += 1
+                report.append(_("RESPINS  %(label)s: %(reason)s") % {'label': label, 'reason': error})
+                continue
+
+            maps['existing'].add((contract.id, _norm(invoice['number'])))
+            maps['ledger'][contract.id][0] += document_total
+            vals_list.append({
+                'implementation_id': self.implementation_id.id,
+                'contract_id': contract.id,
+                'document_type': 'invoice',
+                'document_number': invoice['number'],
+                'document_date': document_date,
+                'issuer_name': invoice['supplier'],
+                'notes': _("Import e-Factura: %s") % filename,
+                'line_ids': line_commands,
+            })
+            report.append(_("OK       %(label)s -> contract %(contract)s (%(cnt)s linii)") % {
+                'label': label,
+                'contract': contract.contract_number,
+                'cnt': len(line_commands),
+            })
+
+        return vals_list, report, skipped
+
+    def _reopen(self):
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Import e-Factura'),
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+    # ----------------------------
+    # Acțiuni
+    # ----------------------------
+    def action_preview(self):
+        """Dry-run: raportul potrivirilor, fără nicio scriere în documente."""
+        self.ensure_one()
+        if not self._get_upload_attachment():
+            raise ValidationError(_("Selectează un fișier XML sau o arhivă ZIP."))
+
+        vals_list, report, skipped = self._prepare_import()
+        self.write({
+            'state': 'preview',
+            'report': "\n".join(report) or _("Niciun fișier XML găsit."),
+            'matched_count': len(vals_list),
+            'skipped_count': skipped,
+        })
+        return self._reopen()
+
+    def action_import(self):
+        self.ensure_one()
+        if not self._get_upload_attachment():
+            raise ValidationError(_("Selectează un fișier XML sau o arhivă ZIP."))
+
+        vals_list, report, skipped = self._prepare_import()
+
+        # plafonul ca în formular (ledger-ul contractului blocat), dar verificat o singură dată după toate loturile
+        Document = self.env['project.document'].with_context(
+            enforce_document_contract_ceiling=True,
+            defer_implementation_checks=True,
+        )
+        documents = Document.browse()
+        for start in range(0, len(vals_list), IMPORT_BATCH_SIZE):
+            documents |= Document.create(vals_list[start:start + IMPORT_BATCH_SIZE])
+        documents._run_deferred_checks()
+
+        _logger.info(
+            "Import e-Factura impl=%s: %s documente create, %s respinse",
+            self.implementation_id.id, len(documents), skipped,
+        )
+        self.write({
+            'state': 'done',
+            'report': "\n".join(report) or _("Niciun fișier XML găsit."),
+            'matched_count': len(vals_list),
+            'skipped_count': skipped,
+            'created_count': len(documents),
+        })
+        return self._reopen()
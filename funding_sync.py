@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+from odoo import models, api, _
+from odoo.exceptions import ValidationError
+
+from .implementation import PROXY_SYNC_SPECS
+
+
+class ProjectFundingProxySyncMixin(models.AbstractModel):
+    """
+    Hook pe înregistrările din project_funding (deviz / achiziții / activități):
+    - create: marchează implementările proiectului ca „de sincronizat” și pornește cron-ul;
+    - unlink: șterge liniile proxy nefolosite care indică spre înregistrările șterse.
+    Sincronizarea propriu-zisă (delta minimă, set-based) rulează în cron, nu în tranzacția utilizatorului.
+    """
+    _name = 'project.funding.proxy.sync.mixin'
+    _description = 'Sincronizare automată proxy implementare'
+
+    # cheie din PROXY_SYNC_SPECS, setată de fiecare model moștenitor
+    _proxy_sync_kind = None
+
+    def _get_proxy_sync_spec(self):
+        return PROXY_SYNC_SPECS[self._proxy_sync_kind]
+
+    def _mark_implementations_for_proxy_sync(self):
+        project_ids = self.mapped('project_id').ids
+        if not project_ids:
+            return
+        implementations = self.env['project.implementation'].sudo().search([
+            ('funding_project_id', 'in', project_ids),
+            ('funding_sync_pending', '=', False),
+        ])
+        if implementations:
+            implementations.write({'funding_sync_pending': True})
+        cron = self.env.ref('project_implementation.ir_cron_sync_funding_proxies', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        records._mark_implementations_for_proxy_sync()
+        return records
+
+    def unlink(self):
+        proxy_model, funding_field, _source_model = self._get_proxy_sync_spec()
+        proxies = self.env[proxy_model].sudo().search([(funding_field, 'in', self.ids)])
+        if proxies and proxy_model == 'project.implementation.budget.line':
+            used = self.env['project.contract.line'].sudo().search_count([('budget_proxy_line_id', 'in', proxies.ids)])
+            if used:
+                raise ValidationError(_(
+                    "Nu puteți șterge linia de deviz deoarece este folosită în implementare.\n\n"
+                    "Număr linii de contract asociate: %(cnt)s"
+                ) % {'cnt': used})
+        proxies.unlink()
+        return super().unlink()
+
+
+class ProjectBudget(models.Model):
+    _name = 'project.budget'
+    _inherit = ['project.budget', 'project.funding.proxy.sync.mixin']
+    _proxy_sync_kind = 'budget'
+
+
+class ProjectAcquisition(models.Model):
+    _name = 'project.acquisition'
+    _inherit = ['project.acquisition', 'project.funding.proxy.sync.mixin']
+    _proxy_sync_kind = 'acquisition'
+
+
+class ProjectActivity(models.Model):
+    _name = 'project.activity'
+    _inherit = ['project.activity', 'project.funding.proxy.sync.mixin']
+    _proxy_sync_kind = 'activity'
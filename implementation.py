@@ -1,6 +1,18 @@
 # -*- coding: utf-8 -*-
+import logging
+
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+# tip sincronizare -> (model proxy, câmp funding pe proxy, model funding)
+PROXY_SYNC_SPECS = {
+    'budget': ('project.implementation.budget.line', 'funding_budget_line_id', 'project.budget'),
+    'acquisition': ('project.implementation.acquisition.line', 'funding_acquisition_id', 'project.acquisition'),
+    'activity': ('project.implementation.activity.line', 'funding_activity_id', 'project.activity'),
+}
 
 
 class ProjectImplementation(models.Model):
@@ -60,6 +72,15 @@ class ProjectImplementation(models.Model):
         default='draft',
     )
 
+    # coadă pentru cron: setat când apar înregistrări noi în funding (deviz / achiziții / activități)
+    funding_sync_pending = fields.Boolean(
+        string='Sincronizare funding în așteptare',
+        default=False,
+        copy=False,
+        readonly=True,
+        index=True,
+    )
+
     # -------------------------
     # Implementation-owned data
     # -------------------------
@@ -134,18 +155,7 @@ class ProjectImplementation(models.Model):
     def action_sync_budget_from_funding(self):
         """Generează liniile proxy pe baza devizului din funding (read-only source) și face refresh la form."""
         self.ensure_one()
-
-        funding_lines = self.funding_project_id.budget_line_ids
-        existing_funding_line_ids = {l.funding_budget_line_id.id for l in self.budget_proxy_line_ids}
-
-        to_create = [
-            {'implementation_id': self.id, 'funding_budget_line_id': fline.id}
-            for fline in funding_lines
-            if fline.id not in existing_funding_line_ids
-        ]
-
-        if to_create:
-            self.env['project.implementation.budget.line'].create(to_create)
+        self._sync_proxies_from_funding(kinds=('budget',))
 
         return {
             'type': 'ir.actions.act_window',
@@ -163,21 +173,7 @@ class ProjectImplementation(models.Model):
     def action_sync_acquisitions_from_funding(self):
         """Generează liniile proxy pe baza achizițiilor din funding (read-only source) și face refresh la form."""
         self.ensure_one()
-
-        funding_acquisitions = self.env['project.acquisition'].search([
-            ('project_id', '=', self.funding_project_id.id),
-        ], order='sequence, id')
-
-        existing_funding_acq_ids = {l.funding_acquisition_id.id for l in self.acquisition_proxy_line_ids}
-
-        to_create = [
-            {'implementation_id': self.id, 'funding_acquisition_id': acq.id}
-            for acq in funding_acquisitions
-            if acq.id not in existing_funding_acq_ids
-        ]
-
-        if to_create:
-            self.env['project.implementation.acquisition.line'].create(to_create)
+        self._sync_proxies_from_funding(kinds=('acquisition',))
 
         return {
             'type': 'ir.actions.act_window',
@@ -195,21 +191,7 @@ class ProjectImplementation(models.Model):
     def action_sync_activities_from_funding(self):
         """Generează liniile proxy pe baza activităților din funding (read-only source) și face refresh la form."""
         self.ensure_one()
-
-        funding_activities = self.env['project.activity'].search([
-            ('project_id', '=', self.funding_project_id.id),
-        ], order='sequence, id')
-
-        existing_funding_act_ids = {l.funding_activity_id.id for l in self.activity_proxy_line_ids}
-
-        to_create = [
-            {'implementation_id': self.id, 'funding_activity_id': act.id}
-            for act in funding_activities
-            if act.id not in existing_funding_act_ids
-        ]
-
-        if to_create:
-            self.env['project.implementation.activity.line'].create(to_create)
+        self._sync_proxies_from_funding(kinds=('activity',))
 
         return {
             'type': 'ir.actions.act_window',
@@ -221,6 +203,141 @@ class ProjectImplementation(models.Model):
             'context': dict(self.env.context),
         }
 
+    # =========================
+    # SYNC SET-BASED (portofoliu): deviz + achiziții + activități
+    # =========================
+    def action_sync_all_from_funding(self):
+        """Sincronizează toate proxy-urile pentru implementările selectate și afișează un sumar."""
+        stats = self._sync_proxies_from_funding()
+
+        labels = {
+            'budget': _('Deviz'),
+            'acquisition': _('Achiziții'),
+            'activity': _('Activități'),
+        }
+        message = "\n".join(
+            _("%(kind)s: %(created)s create, %(unchanged)s neschimbate, %(orphaned)s orfane") % {
+                'kind': labels[kind],
+                **counts,
+            }
+            for kind, counts in stats.items()
+        )
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Sincronizare din funding (%s implementări)') % len(self),
+                'message': message,
+                'type': 'success',
+                'sticky': True,
+            },
+        }
+
+    def _sync_proxies_from_funding(self, kinds=None):
+        """
+        Creează liniile proxy lipsă pentru toate implementările din self, cu câte un
+        INSERT ... SELECT ... ON CONFLICT DO NOTHING per tip (garantat de constrângerile unique).
+
+        Returnează {tip: {'created': n, 'unchanged': n, 'orphaned': n}}, unde „orfane” sunt
+        liniile proxy a căror înregistrare funding nu mai aparține proiectului implementării.
+        """
+        kinds = kinds or tuple(PROXY_SYNC_SPECS)
+        stats = {}
+        if not self:
+            return stats
+
+        impl_ids = tuple(self.ids)
+        self.flush_recordset(['funding_project_id'])
+
+        for kind in kinds:
+            proxy_model, funding_field, source_model = PROXY_SYNC_SPECS[kind]
+            Proxy = self.env[proxy_model]
+            Source = self.env[source_model]
+            Proxy.check_access('create')
+            Source.flush_model(['project_id'])
+            Proxy.flush_model(['implementation_id', funding_field])
+
+            columns = [
+                SQL.identifier('implementation_id'), SQL.identifier(funding_field),
+                SQL.identifier('create_uid'), SQL.identifier('create_date'),
+                SQL.identifier('write_uid'), SQL.identifier('write_date'),
+            ]
+            values = [
+                SQL('i.id'), SQL('f.id'),
+                SQL('%s', self.env.uid), SQL("(now() at time zone 'UTC')"),
+                SQL('%s', self.env.uid), SQL("(now() at time zone 'UTC')"),
+            ]
+            if 'currency_id' in Proxy._fields and Proxy._fields['currency_id'].store:
+                columns.append(SQL.identifier('currency_id'))
+                values.append(SQL('%s', self.env.company.currency_id.id))
+
+            created_ids = [row[0] for row in self.env.execute_query(SQL(
+                """
+                INSERT INTO %(proxy)s (%(columns)s)
+                SELECT %(values)s
+                  FROM project_implementation i
+                  JOIN %(source)s f ON f.project_id = i.funding_project_id
+                 WHERE i.id IN %(impl_ids)s
+              ORDER BY i.id, f.id
+                    ON CONFLICT (implementation_id, %(funding_field)s) DO NOTHING
+             RETURNING id
+                """,
+                proxy=SQL.identifier(Proxy._table),
+                columns=SQL(', ').join(columns),
+                values=SQL(', ').join(values),
+                source=SQL.identifier(Source._table),
+                impl_ids=impl_ids,
+                funding_field=SQL.identifier(funding_field),
+            ))]
+
+            [(total, orphaned)] = self.env.execute_query(SQL(
+                """
+                SELECT COUNT(*),
+                       COUNT(*) FILTER (WHERE f.project_id IS DISTINCT FROM i.funding_project_id)
+                  FROM %(proxy)s p
+                  JOIN project_implementation i ON i.id = p.implementation_id
+                  JOIN %(source)s f ON f.id = p.%(funding_field)s
+                 WHERE p.implementation_id IN %(impl_ids)s
+                """,
+                proxy=SQL.identifier(Proxy._table),
+                source=SQL.identifier(Source._table),
+                impl_ids=impl_ids,
+                funding_field=SQL.identifier(funding_field),
+            ))
+
+            # rândurile inserate direct în SQL: cache invalid + câmpurile stocate calculate de ORM
+            Proxy.invalidate_model()
+            created = Proxy.browse(created_ids)
+            if created:
+                for field in Proxy._fields.values():
+                    if field.store and field.compute:
+                        self.env.add_to_compute(field, created)
+
+            stats[kind] = {
+                'created': len(created_ids),
+                'unchanged': total - len(created_ids) - orphaned,
+                'orphaned': orphaned,
+            }
+            _logger.info("Sync %s din funding pentru %s implementări: %s", kind, len(impl_ids), stats[kind])
+
+        self.invalidate_recordset(['budget_proxy_line_ids', 'acquisition_proxy_line_ids', 'activity_proxy_line_ids'])
+        self.env.flush_all()
+        return stats
+
+    @api.model
+    def _cron_sync_funding_proxies(self, batch_size=50):
+        """Cron: sincronizează un lot de implementări marcate; dacă mai rămân, se re-programează."""
+        pending = self.search([('funding_sync_pending', '=', True)], limit=batch_size + 1, order='id')
+        batch = pending[:batch_size]
+        if not batch:
+            return
+
+        batch._sync_proxies_from_funding()
+        batch.write({'funding_sync_pending': False})
+
+        if len(pending) > batch_size:
+            self.env.ref('project_implementation.ir_cron_sync_funding_proxies')._trigger()
+
     # =========================
     # ACTIONS (read-only pentru funding)
     # =========================
@@ -254,7 +371,7 @@ class ProjectImplementation(models.Model):
             'type': 'ir.actions.act_window',
             'name': _('Contracte'),
             'res_model': 'project.contract',
-            'view_mode': 'list,form',
+            'view_mode': 'list,pivot,form',
             'domain': [('implementation_id', '=', self.id)],
             'context': {'default_implementation_id': self.id},
             'target': 'current',
@@ -286,6 +403,42 @@ class ProjectImplementation(models.Model):
 
     file_ids = fields.One2many('project.file', 'implementation_id', string='Fișiere')
 
+    def action_open_reimport_wizard(self):
+        """Reimport al corecturilor făcute în 00_BazaProiect.xlsx (după coloanele de id)."""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Reimport 00_BazaProiect'),
+            'res_model': 'project.implementation.reimport.wizard',
+            'view_mode': 'form',
+            'context': {'default_implementation_id': self.id},
+            'target': 'new',
+        }
+
+    def action_open_contract_import_wizard(self):
+        """Import în lot al contractelor și liniilor de contract dintr-un XLSX / CSV."""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Import contracte'),
+            'res_model': 'project.contract.import.wizard',
+            'view_mode': 'form',
+            'context': {'default_implementation_id': self.id},
+            'target': 'new',
+        }
+
+    def action_open_ubl_import_wizard(self):
+        """Import în lot al facturilor e-Factura (XML / ZIP) ca documente ale implementării."""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Import e-Factura'),
+            'res_model': 'project.document.import.ubl.wizard',
+            'view_mode': 'form',
+            'context': {'default_implementation_id': self.id},
+            'target': 'new',
+        }
+
     def action_open_files_manager(self):
         self.ensure_one()
         return {
@@ -333,30 +486,30 @@ class ProjectImplementationAcquisitionLine(models.Model):
         index=True,
     )
 
-    # Mirror fields (read-only) - UPDATED per cerință
-    name = fields.Char(string='Denumire achiziție', related='funding_acquisition_id.name', store=False, readonly=True)
-    code = fields.Char(string='Cod achiziție', related='funding_acquisition_id.code', store=False, readonly=True)
-    sequence = fields.Integer(string='Ordine', related='funding_acquisition_id.sequence', store=False, readonly=True)
+    # Mirror fields (read-only), stocate: _order / grupare / filtre rulează în SQL
+    name = fields.Char(string='Denumire achiziție', related='funding_acquisition_id.name', store=True, readonly=True)
+    code = fields.Char(string='Cod achiziție', related='funding_acquisition_id.code', store=True, readonly=True, index=True)
+    sequence = fields.Integer(string='Ordine', related='funding_acquisition_id.sequence', store=True, readonly=True, index=True)
 
-    date_start = fields.Date(string='Data început', related='funding_acquisition_id.date_start', store=False, readonly=True)
-    date_end = fields.Date(string='Data sfârșit', related='funding_acquisition_id.date_end', store=False, readonly=True)
+    date_start = fields.Date(string='Data început', related='funding_acquisition_id.date_start', store=True, readonly=True)
+    date_end = fields.Date(string='Data sfârșit', related='funding_acquisition_id.date_end', store=True, readonly=True)
 
-    deviz_baza = fields.Float(string='Bază (deviz)', related='funding_acquisition_id.baza', store=False, readonly=True)
-    deviz_tva = fields.Float(string='TVA (deviz)', related='funding_acquisition_id.tva', store=False, readonly=True)
+    deviz_baza = fields.Float(string='Bază (deviz)', related='funding_acquisition_id.baza', store=True, readonly=True)
+    deviz_tva = fields.Float(string='TVA (deviz)', related='funding_acquisition_id.tva', store=True, readonly=True)
 
     # Contracted totals (from contracts in this implementation linked to this acquisition)
     amount_contracted_base = fields.Monetary(
         string='Contractat bază',
         currency_field='currency_id',
         compute='_compute_contracted_amounts',
-        store=False,
+        store=True,
         readonly=True,
     )
     amount_contracted_vat = fields.Monetary(
         string='Contractat TVA',
         currency_field='currency_id',
         compute='_compute_contracted_amounts',
-        store=False,
+        store=True,
         readonly=True,
     )
 
@@ -368,21 +521,30 @@ class ProjectImplementationAcquisitionLine(models.Model):
         readonly=True,
     )
 
+    _sql_constraints = [
+        (
+            'uniq_impl_funding_acquisition',
+            'unique(implementation_id, funding_acquisition_id)',
+            'Linia proxy există deja pentru această achiziție.',
+        )
+    ]
+
     @api.depends(
+        'funding_acquisition_id',
         'implementation_id.contract_ids',
         'implementation_id.contract_ids.acquisition_id',
-        'implementation_id.contract_ids.line_ids',
-        'implementation_id.contract_ids.line_ids.base_amount',
-        'implementation_id.contract_ids.line_ids.vat_amount',
+        'implementation_id.contract_ids.amount_base_total',
+        'implementation_id.contract_ids.amount_vat_total',
     )
     def _compute_contracted_amounts(self):
+        # un singur GROUP BY (implementare, achiziție) pentru toate liniile
+        totals = self.env['project.implementation.totals']._contract_totals_by_acquisition(
+            self.implementation_id.ids
+        )
         for rec in self:
-            contracts = rec.implementation_id.contract_ids.filtered(
-                lambda c: c.acquisition_id and c.acquisition_id.id == rec.funding_acquisition_id.id
-            )
-            lines = contracts.mapped('line_ids')
-            rec.amount_contracted_base = sum(lines.mapped('base_amount') or [0.0])
-            rec.amount_contracted_vat = sum(lines.mapped('vat_amount') or [0.0])
+            base, vat = totals.get((rec.implementation_id.id, rec.funding_acquisition_id.id), (0.0, 0.0))
+            rec.amount_contracted_base = base
+            rec.amount_contracted_vat = vat
 
 
 class ProjectImplementationActivityLine(models.Model):
@@ -415,42 +577,49 @@ class ProjectImplementationActivityLine(models.Model):
         index=True,
     )
 
-    # Mirror fields (read-only) - kept generic to avoid depending on exact activity model fields
-    name = fields.Char(string='Denumire', related='funding_activity_id.name', store=False, readonly=True)
-    sequence = fields.Integer(string='Ordine', related='funding_activity_id.sequence', store=False, readonly=True)
-    date_start = fields.Date(string='Data început (plan)', related='funding_activity_id.date_start', store=False, readonly=True)
-    date_end = fields.Date(string='Data sfârșit (plan)', related='funding_activity_id.date_end', store=False, readonly=True)
+    # Mirror fields (read-only), stocate: _order / grupare / filtre rulează în SQL
+    name = fields.Char(string='Denumire', related='funding_activity_id.name', store=True, readonly=True)
+    sequence = fields.Integer(string='Ordine', related='funding_activity_id.sequence', store=True, readonly=True, index=True)
+    date_start = fields.Date(string='Data început (plan)', related='funding_activity_id.date_start', store=True, readonly=True)
+    date_end = fields.Date(string='Data sfârșit (plan)', related='funding_activity_id.date_end', store=True, readonly=True)
 
     min_contract_date = fields.Date(
         string='Min contract',
         compute='_compute_contract_date_bounds',
-        store=False,
+        store=True,
         readonly=True,
     )
     max_contract_date = fields.Date(
         string='Max contract',
         compute='_compute_contract_date_bounds',
-        store=False,
+        store=True,
         readonly=True,
     )
 
+    _sql_constraints = [
+        (
+            'uniq_impl_funding_activity',
+            'unique(implementation_id, funding_activity_id)',
+            'Linia proxy există deja pentru această activitate.',
+        )
+    ]
+
     @api.depends(
+        'funding_activity_id',
         'implementation_id.contract_ids',
         'implementation_id.contract_ids.activity_id',
         'implementation_id.contract_ids.start_date',
         'implementation_id.contract_ids.end_date',
     )
     def _compute_contract_date_bounds(self):
+        # un singur MIN/MAX grupat pe (implementare, activitate) pentru toate liniile
+        bounds = self.env['project.implementation.totals']._contract_date_bounds_by_activity(
+            self.implementation_id.ids
+        )
         for rec in self:
-            contracts = rec.implementation_id.contract_ids.filtered(
-                lambda c: c.activity_id and c.activity_id.id == rec.funding_activity_id.id
-            )
-
-            starts = [d for d in contracts.mapped('start_date') if d]
-            ends = [d for d in contracts.mapped('end_date') if d]
-
-            rec.min_contract_date = min(starts) if starts else False
-            rec.max_contract_date = max(ends) if ends else False
+            min_start, max_end = bounds.get((rec.implementation_id.id, rec.funding_activity_id.id), (False, False))
+            rec.min_contract_date = min_start or False
+            rec.max_contract_date = max_end or False
 
 
 # =====================================================
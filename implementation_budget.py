@@ -24,23 +24,26 @@ class ProjectImplementationBudgetLine(models.Model):
         index=True,
     )
 
-    # --- read-only mirror (funding) ---
-    chapter = fields.Char(related='funding_budget_line_id.chapter', readonly=True, store=False)
-    subchapter = fields.Char(related='funding_budget_line_id.subchapter', readonly=True, store=False)
-    name = fields.Char(related='funding_budget_line_id.name', readonly=True, store=False)
+    # --- read-only mirror (funding), stocat: sortare / grupare / căutare în SQL ---
+    chapter = fields.Char(related='funding_budget_line_id.chapter', readonly=True, store=True, index=True)
+    subchapter = fields.Char(related='funding_budget_line_id.subchapter', readonly=True, store=True, index=True)
+    name = fields.Char(related='funding_budget_line_id.name', readonly=True, store=True)
 
-    total_eligibil = fields.Float(related='funding_budget_line_id.total_eligibil', readonly=True, store=False)
-    total_neeligibil = fields.Float(related='funding_budget_line_id.total_neeligibil', readonly=True, store=False)
+    total_eligibil = fields.Float(related='funding_budget_line_id.total_eligibil', readonly=True, store=True)
+    total_neeligibil = fields.Float(related='funding_budget_line_id.total_neeligibil', readonly=True, store=True)
+
+    # Agregate de execuție: stocate, recalculate doar pentru liniile de deviz afectate
+    # la create/write/unlink pe liniile de contract / document / decontare.
 
     # Contracte
-    contract_base_total = fields.Float(string='Contracte bază (lei)', compute='_compute_contracts_documents_settlements', store=False)
-    contract_vat_total = fields.Float(string='Contracte TVA (lei)', compute='_compute_contracts_documents_settlements', store=False)
-    contract_total = fields.Float(string='Contracte total (lei)', compute='_compute_contracts_documents_settlements', store=False)
+    contract_base_total = fields.Float(string='Contracte bază (lei)', compute='_compute_contracts_documents_settlements', store=True)
+    contract_vat_total = fields.Float(string='Contracte TVA (lei)', compute='_compute_contracts_documents_settlements', store=True)
+    contract_total = fields.Float(string='Contracte total (lei)', compute='_compute_contracts_documents_settlements', store=True)
 
     # Documente
-    documents_elig_total = fields.Float(string='Documente eligibil (lei)', compute='_compute_contracts_documents_settlements', store=False)
-    documents_neelig_total = fields.Float(string='Documente neeligibil (lei)', compute='_compute_contracts_documents_settlements', store=False)
-    documents_total = fields.Float(string='Documente total (lei)', compute='_compute_contracts_documents_settlements', store=False)
+    documents_elig_total = fields.Float(string='Documente eligibil (lei)', compute='_compute_contracts_documents_settlements', store=True)
+    documents_neelig_total = fields.Float(string='Documente neeligibil (lei)', compute='_compute_contracts_documents_settlements', store=True)
+    documents_total = fields.Float(string='Documente total (lei)', compute='_compute_contracts_documents_settlements', store=True)
 
     # Sold (deviz total - documente total)
     sold_total = fields.Float(string='Sold (lei)', compute='_compute_sold_total', store=False)
@@ -56,13 +59,12 @@ class ProjectImplementationBudgetLine(models.Model):
 
     @api.depends('implementation_id.funding_project_id.aport_coef', 'total_eligibil')
     def _compute_neramb_total(self):
+        funding = self.env['project.implementation.totals']._funding_snapshot(self.implementation_id.ids)
         for rec in self:
-            aport_coef = rec.implementation_id.funding_project_id.aport_coef or 0.0
-            neramb_coef = max(0.0, 1.0 - aport_coef)
-            rec.neramb_total = (rec.total_eligibil or 0.0) * neramb_coef
+            rec.neramb_total = (rec.total_eligibil or 0.0) * funding.neramb_coef(rec.implementation_id.id)
 
     # Decontat
-    settlements_total = fields.Float(string='Decontat (lei)', compute='_compute_contracts_documents_settlements', store=False)
+    settlements_total = fields.Float(string='Decontat (lei)', compute='_compute_contracts_documents_settlements', store=True)
 
     # Diferență nerambursabil vs decontat
     neramb_minus_settled = fields.Float(string='Dif. neramb - decontat (lei)', compute='_compute_neramb_minus_settled', store=False)
@@ -83,49 +85,39 @@ class ProjectImplementationBudgetLine(models.Model):
         readonly=True,
     )
 
-    document_line_ids = fields.One2many(
-        comodel_name='project.document.line',
-        inverse_name='contract_line_id',  # dummy; nu îl folosim, îl calculăm prin search
-        compute='_compute_document_line_ids',
-        string='Linii document (pe această linie de deviz)',
-        readonly=True,
-        store=False,
-    )
+    def _action_open_lines(self, model_name, title, view_xmlid):
+        """Lista liniilor (document / decontare) de pe această linie de deviz.
 
-    settlement_line_ids = fields.One2many(
-        comodel_name='project.settlement.line',
-        inverse_name='document_line_id',  # dummy; nu îl folosim, îl calculăm prin search
-        compute='_compute_settlement_line_ids',
-        string='Linii decontare (pe această linie de deviz)',
-        readonly=True,
-        store=False,
-    )
+        Domeniul pe budget_proxy_line_id (stocat, indexat) e paginat de server:
+        se citește doar pagina afișată, nu toate liniile la deschiderea detaliilor.
+        """
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': title,
+            'res_model': model_name,
+            'view_mode': 'list',
+            'views': [(self.env.ref(view_xmlid).id, 'list')],
+            'domain': [
+                ('implementation_id', '=', self.implementation_id.id),
+                ('budget_proxy_line_id', '=', self.id),
+            ],
+            'target': 'current',
+        }
 
-    @api.depends('implementation_id')
-    def _compute_document_line_ids(self):
-        DocumentLine = self.env['project.document.line']
-        for rec in self:
-            if not rec.implementation_id:
-                rec.document_line_ids = DocumentLine.browse()
-                continue
-            # document lines legate prin contract_line_id.budget_proxy_line_id = rec.id
-            rec.document_line_ids = DocumentLine.search([
-                ('document_id.implementation_id', '=', rec.implementation_id.id),
-                ('contract_line_id.budget_proxy_line_id', '=', rec.id),
-            ], order='id desc')
-
-    @api.depends('implementation_id')
-    def _compute_settlement_line_ids(self):
-        SettlementLine = self.env['project.settlement.line']
-        for rec in self:
-            if not rec.implementation_id:
-                rec.settlement_line_ids = SettlementLine.browse()
-                continue
-            # settlement lines legate prin document_line_id.budget_proxy_line_id = rec.id
-            rec.settlement_line_ids = SettlementLine.search([
-                ('settlement_id.implementation_id', '=', rec.implementation_id.id),
-                ('document_line_id.budget_proxy_line_id', '=', rec.id),
-            ], order='id desc')
+    def action_open_document_lines(self):
+        return self._action_open_lines(
+            'project.document.line',
+            _('Linii document - %s') % (self.name or ''),
+            'project_implementation.view_project_document_line_list_budget',
+        )
+
+    def action_open_settlement_lines(self):
+        return self._action_open_lines(
+            'project.settlement.line',
+            _('Linii decontare - %s') % (self.name or ''),
+            'project_implementation.view_project_settlement_line_list_budget',
+        )
 
     def action_open_details(self):
         self.ensure_one()
@@ -141,20 +133,21 @@ class ProjectImplementationBudgetLine(models.Model):
         }
 
     # =========================================================
-    # EXISTENT: compute agregate (nemodificat)
+    # Agregate stocate: dependențele urmează lanțul
+    # linie deviz -> linii contract -> linii document -> linii decontare,
+    # deci ORM-ul recalculează doar liniile de deviz atinse de o modificare.
     # =========================================================
     @api.depends(
         'implementation_id',
-        'implementation_id.contract_ids.line_ids.base_amount',
-        'implementation_id.contract_ids.line_ids.vat_amount',
-        'implementation_id.contract_ids.line_ids.total_amount',
-        'implementation_id.document_ids.line_ids.elig_base_amount',
-        'implementation_id.document_ids.line_ids.elig_vat_amount',
-        'implementation_id.document_ids.line_ids.neelig_base_amount',
-        'implementation_id.document_ids.line_ids.neelig_vat_amount',
-        'implementation_id.settlement_ids.line_ids.elig_base_amount',
-        'implementation_id.settlement_ids.line_ids.elig_vat_amount',
-        'implementation_id.settlement_ids.line_ids.document_line_id',
+        'contract_line_ids.base_amount',
+        'contract_line_ids.vat_amount',
+        'contract_line_ids.total_amount',
+        'contract_line_ids.document_line_ids.elig_base_amount',
+        'contract_line_ids.document_line_ids.elig_vat_amount',
+        'contract_line_ids.document_line_ids.neelig_base_amount',
+        'contract_line_ids.document_line_ids.neelig_vat_amount',
+        'contract_line_ids.document_line_ids.settlement_line_ids.elig_base_amount',
+        'contract_line_ids.document_line_ids.settlement_line_ids.elig_vat_amount',
     )
     def _compute_contracts_documents_settlements(self):
         recs = self.filtered(lambda r: r.implementation_id)
@@ -165,50 +158,12 @@ class ProjectImplementationBudgetLine(models.Model):
                 rec.settlements_total = 0.0
             return
 
-        impl_ids = list(set(recs.mapped('implementation_id').ids))
-        budget_ids = list(set(recs.ids))
-
-        contract_totals = {}  # budget_id -> (base, vat, total)
-        ContractLine = self.env['project.contract.line']
-        contract_lines = ContractLine.search([
-            ('contract_id.implementation_id', 'in', impl_ids),
-            ('budget_proxy_line_id', 'in', budget_ids),
-        ])
-        for cl in contract_lines:
-            bid = cl.budget_proxy_line_id.id
-            base, vat, total = contract_totals.get(bid, (0.0, 0.0, 0.0))
-            base += (cl.base_amount or 0.0)
-            vat += (cl.vat_amount or 0.0)
-            total += (cl.total_amount or ((cl.base_amount or 0.0) + (cl.vat_amount or 0.0)))
-            contract_totals[bid] = (base, vat, total)
-
-        doc_totals = {}  # budget_id -> (elig_total, neelig_total)
-        DocumentLine = self.env['project.document.line']
-        doc_lines = DocumentLine.search([
-            ('document_id.implementation_id', 'in', impl_ids),
-            ('contract_line_id.budget_proxy_line_id', 'in', budget_ids),
-        ])
-        for dl in doc_lines:
-            bpl = dl.contract_line_id.budget_proxy_line_id
-            if not bpl:
-                continue
-            bid = bpl.id
-            elig = (dl.elig_base_amount or 0.0) + (dl.elig_vat_amount or 0.0)
-            neelig = (dl.neelig_base_amount or 0.0) + (dl.neelig_vat_amount or 0.0)
-            e_sum, n_sum = doc_totals.get(bid, (0.0, 0.0))
-            doc_totals[bid] = (e_sum + elig, n_sum + neelig)
-
-        sett_totals = {}  # budget_id -> total_settled
-        SettlementLine = self.env['project.settlement.line']
-        settlement_lines = SettlementLine.search([
-            ('settlement_id.implementation_id', 'in', impl_ids),
-            ('document_line_id.budget_proxy_line_id', 'in', budget_ids),
-        ])
-        for sl in settlement_lines:
-            bpl = sl.document_line_id.budget_proxy_line_id
-            if not bpl:
-                continue
-            sett_totals[bpl.id] = (sett_totals.get(bpl.id, 0.0) or 0.0) + (sl.elig_base_amount or 0.0) + (sl.elig_vat_amount or 0.0)
+        # un GROUP BY per nivel (contracte / documente / decontări), pentru tot recordset-ul
+        Totals = self.env['project.implementation.totals']
+        budget_ids = recs.ids
+        contract_totals = Totals._contract_totals_by_budget_line(budget_ids)
+        doc_totals = Totals._document_totals_by_budget_line(budget_ids)
+        sett_totals = Totals._settlement_totals_by_budget_line(budget_ids)
 
         for rec in recs:
             c_base, c_vat, c_total = contract_totals.get(rec.id, (0.0, 0.0, 0.0))
@@ -216,12 +171,13 @@ class ProjectImplementationBudgetLine(models.Model):
             rec.contract_vat_total = c_vat
             rec.contract_total = c_total
 
-            d_elig, d_neelig = doc_totals.get(rec.id, (0.0, 0.0))
-            rec.documents_elig_total = d_elig
-            rec.documents_neelig_total = d_neelig
-            rec.documents_total = d_elig + d_neelig
+            e_base, e_vat, n_base, n_vat = doc_totals.get(rec.id, (0.0, 0.0, 0.0, 0.0))
+            rec.documents_elig_total = e_base + e_vat
+            rec.documents_neelig_total = n_base + n_vat
+            rec.documents_total = rec.documents_elig_total + rec.documents_neelig_total
 
-            rec.settlements_total = sett_totals.get(rec.id, 0.0) or 0.0
+            s_base, s_vat = sett_totals.get(rec.id, (0.0, 0.0))
+            rec.settlements_total = s_base + s_vat
 
         for rec in (self - recs):
             rec.contract_base_total = rec.contract_vat_total = rec.contract_total = 0.0
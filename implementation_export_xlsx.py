@@ -125,35 +125,29 @@ class ProjectImplementation(models.Model):
             ws.write(row, col, h, fmt_hdr)
         row += 1
 
-        aport_coef = getattr(self.funding_project_id, 'aport_coef', 0.0) or 0.0
+        # coeficient + plan deviz (eligibil, neeligibil, total) citite o dată pentru toată foaia
+        funding = self.env['project.implementation.totals']._funding_snapshot(
+            self.ids, budget_line_ids=self.budget_proxy_line_ids.ids,
+        )
+        aport_coef = funding.aport_coef(self.id)
 
         for bl in self.budget_proxy_line_ids:
-            fb = bl.funding_budget_line_id  # project.budget (funding)
-
-            elig_baza = (fb.chelt_elig_baza or 0.0) if fb else 0.0
-            elig_tva = (fb.chelt_elig_tva or 0.0) if fb else 0.0
-            elig_total = (fb.total_eligibil or 0.0) if fb else (bl.total_eligibil or 0.0)
-
-            neelig_baza = (fb.chelt_neelig_baza or 0.0) if fb else 0.0
-            neelig_tva = (fb.chelt_neelig_tva or 0.0) if fb else 0.0
-            neelig_total = (fb.total_neeligibil or 0.0) if fb else (bl.total_neeligibil or 0.0)
+            plan = funding.plan(bl.id)  # deviz funding, citit o dată în snapshot
 
-            deviz_total = (fb.total or 0.0) if fb else ((bl.total_eligibil or 0.0) + (bl.total_neeligibil or 0.0))
+            ws.write(row, 0, plan.nr_crt, fmt_txt)
+            ws.write(row, 1, plan.chapter, fmt_txt)
+            ws.write(row, 2, plan.subchapter, fmt_txt)
+            ws.write(row, 3, plan.name, fmt_txt)
 
-            ws.write(row, 0, fb.nr_crt if fb else '', fmt_txt)
-            ws.write(row, 1, bl.chapter or (fb.chapter if fb else '') or '', fmt_txt)
-            ws.write(row, 2, bl.subchapter or (fb.subchapter if fb else '') or '', fmt_txt)
-            ws.write(row, 3, bl.name or (fb.name if fb else '') or '', fmt_txt)
+            ws.write_number(row, 4, plan.elig_base, fmt_money)
+            ws.write_number(row, 5, plan.elig_vat, fmt_money)
+            ws.write_number(row, 6, plan.elig_total, fmt_money)
 
-            ws.write_number(row, 4, elig_baza, fmt_money)
-            ws.write_number(row, 5, elig_tva, fmt_money)
-            ws.write_number(row, 6, elig_total, fmt_money)
+            ws.write_number(row, 7, plan.neelig_base, fmt_money)
+            ws.write_number(row, 8, plan.neelig_vat, fmt_money)
+            ws.write_number(row, 9, plan.neelig_total, fmt_money)
 
-            ws.write_number(row, 7, neelig_baza, fmt_money)
-            ws.write_number(row, 8, neelig_tva, fmt_money)
-            ws.write_number(row, 9, neelig_total, fmt_money)
-
-            ws.write_number(row, 10, deviz_total, fmt_money)
+            ws.write_number(row, 10, plan.total, fmt_money)
 
             ws.write_number(row, 11, bl.neramb_total or 0.0, fmt_money)
             ws.write_number(row, 12, aport_coef, fmt_pct)
@@ -167,7 +161,7 @@ class ProjectImplementation(models.Model):
             ws.write_number(row, 19, bl.neramb_minus_settled or 0.0, fmt_money)
 
             ws.write_number(row, 20, bl.id or 0, fmt_txt)
-            ws.write_number(row, 21, fb.id if fb else 0, fmt_txt)
+            ws.write_number(row, 21, plan.funding_budget_line_id, fmt_txt)
             row += 1
 
         ws.set_column(0, 3, 28)
@@ -629,22 +623,17 @@ class ProjectImplementation(models.Model):
             ws.write(row, col, h, fmt_hdr)
         row += 1
 
+        # coeficienți + plan deviz pentru toate implementările, citiți o singură dată
+        funding = self.env['project.implementation.totals']._funding_snapshot(
+            implementations.ids, budget_line_ids=implementations.budget_proxy_line_ids.ids,
+        )
+
         for impl in implementations:
-            aport_coef = getattr(impl.funding_project_id, 'aport_coef', 0.0) or 0.0
+            aport_coef = funding.aport_coef(impl.id)
             pref = impl_prefix(impl)
 
             for bl in impl.budget_proxy_line_ids:
-                fb = bl.funding_budget_line_id
-
-                elig_baza = (fb.chelt_elig_baza or 0.0) if fb else 0.0
-                elig_tva = (fb.chelt_elig_tva or 0.0) if fb else 0.0
-                elig_total = (fb.total_eligibil or 0.0) if fb else (bl.total_eligibil or 0.0)
-
-                neelig_baza = (fb.chelt_neelig_baza or 0.0) if fb else 0.0
-                neelig_tva = (fb.chelt_neelig_tva or 0.0) if fb else 0.0
-                neelig_total = (fb.total_neeligibil or 0.0) if fb else (bl.total_neeligibil or 0.0)
-
-                deviz_total = (fb.total or 0.0) if fb else ((bl.total_eligibil or 0.0) + (bl.total_neeligibil or 0.0))
+                plan = funding.plan(bl.id)
 
                 col = 0
                 ws.write_number(row, col, pref[0], fmt_txt); col += 1
@@ -654,20 +643,20 @@ class ProjectImplementation(models.Model):
                 ws.write(row, col, pref[4], fmt_txt); col += 1
                 ws.write(row, col, pref[5], fmt_txt); col += 1
 
-                ws.write(row, col, fb.nr_crt if fb else '', fmt_txt); col += 1
-                ws.write(row, col, bl.chapter or (fb.chapter if fb else '') or '', fmt_txt); col += 1
-                ws.write(row, col, bl.subchapter or (fb.subchapter if fb else '') or '', fmt_txt); col += 1
-                ws.write(row, col, bl.name or (fb.name if fb else '') or '', fmt_txt); col += 1
+                ws.write(row, col, plan.nr_crt, fmt_txt); col += 1
+                ws.write(row, col, plan.chapter, fmt_txt); col += 1
+                ws.write(row, col, plan.subchapter, fmt_txt); col += 1
+                ws.write(row, col, plan.name, fmt_txt); col += 1
 
-                ws.write_number(row, col, elig_baza, fmt_money); col += 1
-                ws.write_number(row, col, elig_tva, fmt_money); col += 1
-                ws.write_number(row, col, elig_total, fmt_money); col += 1
+                ws.write_number(row, col, plan.elig_base, fmt_money); col += 1
+                ws.write_number(row, col, plan.elig_vat, fmt_money); col += 1
+                ws.write_number(row, col, plan.elig_total, fmt_money); col += 1
 
-                ws.write_number(row, col, neelig_baza, fmt_money); col += 1
-                ws.write_number(row, col, neelig_tva, fmt_money); col += 1
-                ws.write_number(row, col, neelig_total, fmt_money); col += 1
+                ws.write_number(row, col, plan.neelig_base, fmt_money); col += 1
+                ws.write_number(row, col, plan.neelig_vat, fmt_money); col += 1
+                ws.write_number(row, col, plan.neelig_total, fmt_money); col += 1
 
-                ws.write_number(row, col, deviz_total, fmt_money); col += 1
+                ws.write_number(row, col, plan.total, fmt_money); col += 1
                 ws.write_number(row, col, bl.neramb_total or 0.0, fmt_money); col += 1
                 ws.write_number(row, col, aport_coef, fmt_pct); col += 1
 
@@ -680,7 +669,7 @@ class ProjectImplementation(models.Model):
                 ws.write_number(row, col, bl.neramb_minus_settled or 0.0, fmt_money); col += 1
 
                 ws.write_number(row, col, bl.id or 0, fmt_txt); col += 1
-                ws.write_number(row, col, fb.id if fb else 0, fmt_txt); col += 1
+                ws.write_number(row, col, plan.funding_budget_line_id, fmt_txt); col += 1
                 row += 1
 
         # 2) CONTRACTE total
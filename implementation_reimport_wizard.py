@@ -0,0 +1,369 @@
+# -*- coding: utf-8 -*-
+import base64
+import datetime
+import io
+import logging
+from collections import defaultdict
+
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError
+
+_logger = logging.getLogger(__name__)
+
+# Foile din 00_BazaProiect.xlsx care se pot reimporta, în ordinea aplicării
+# (antete înaintea liniilor): (foaie, model, coloană id, [(antet, câmp, tip)], reguli TVA auto).
+# Regulă TVA auto: (câmp TVA, câmp bază, câmp cotă, flag manual) - dacă s-a schimbat baza / cota,
+# dar nu și TVA-ul, iar TVA-ul nu e manual, TVA-ul se recalculează ca în formular.
+REIMPORT_SHEETS = [
+    ('Contracte', 'project.contract', 'contract_id', [
+        ('Stare', 'award_state', 'selection'),
+        ('Denumire', 'contract_name', 'char'),
+        ('Număr', 'contract_number', 'char'),
+        ('Data', 'contract_date', 'date'),
+        ('Furnizor', 'supplier_name', 'char'),
+        ('Tip', 'contract_type', 'selection'),
+        ('Procedură', 'procedure_type', 'selection'),
+        ('SEAP nr', 'seap_number', 'char'),
+        ('SEAP data', 'seap_date', 'date'),
+        ('Start', 'start_date', 'date'),
+        ('End', 'end_date', 'date'),
+    ], []),
+    ('Documente', 'project.document', 'document_id', [
+        ('Tip', 'document_type', 'selection'),
+        ('Număr', 'document_number', 'char'),
+        ('Data', 'document_date', 'date'),
+        ('Emitent', 'issuer_name', 'char'),
+    ], []),
+    ('Decontari', 'project.settlement', 'settlement_id', [
+        ('Număr', 'settlement_number', 'char'),
+        ('Data', 'settlement_date', 'date'),
+        ('Observații', 'notes', 'char'),
+    ], []),
+    ('Linii contract', 'project.contract.line', 'contract_line_id', [
+        ('Bază', 'base_amount', 'float'),
+        ('Cota TVA', 'vat_rate', 'float'),
+        ('TVA', 'vat_amount', 'float'),
+        ('Denumire', 'name', 'char'),
+    ], [
+        ('vat_amount', 'base_amount', 'vat_rate', 'vat_manual'),
+    ]),
+    ('Linii document', 'project.document.line', 'document_line_id', [
+        ('Cota TVA', 'vat_rate', 'float'),
+        ('Eligibil bază', 'elig_base_amount', 'float'),
+        ('Eligibil TVA', 'elig_vat_amount', 'float'),
+        ('Neeligibil bază', 'neelig_base_amount', 'float'),
+        ('Neeligibil TVA', 'neelig_vat_amount', 'float'),
+        ('Observații', 'notes', 'char'),
+    ], [
+        ('elig_vat_amount', 'elig_base_amount', 'vat_rate', 'elig_vat_manual'),
+        ('neelig_vat_amount', 'neelig_base_amount', 'vat_rate', 'neelig_vat_manual'),
+    ]),
+    ('Linii decontare', 'project.settlement.line', 'settlement_line_id', [
+        ('elig_base_decontat', 'elig_base_amount', 'float'),
+        ('elig_vat_decontat', 'elig_vat_amount', 'float'),
+    ], [
+        ('elig_vat_amount', 'elig_base_amount', 'vat_rate', 'elig_vat_manual'),
+    ]),
+]
+
+# exportul scrie antetul tabelului după blocul de meta (rândul 7); îl căutăm în primele rânduri
+HEADER_SCAN_ROWS = 20
+
+
+def _cell_text(value):
+    if value is None or value is False:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return ' '.join(str(value).split())
+
+
+def _cell_date(value):
+    if value in (None, ''):
+        return False
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    text = str(value).strip()
+    # exportul scrie datele ca text zz-ll-aaaa
+    for fmt in ('%d-%m-%Y', '%Y-%m-%d', '%d.%m.%Y'):
+        try:
+            return datetime.datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError("dată invalidă: %s" % text)
+
+
+def _cell_float(value):
+    if value in (None, ''):
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).strip().replace(' ', '').replace(',', '.'))
+    except ValueError:
+        raise ValueError("număr invalid: %s" % value)
+
+
+class ProjectImplementationReimportWizard(models.TransientModel):
+    _name = 'project.implementation.reimport.wizard'
+    _description = 'Reimport 00_BazaProiect.xlsx (corecturi)'
+
+    implementation_id = fields.Many2one('project.implementation', string='Implementare', required=True, readonly=True)
+
+    upload = fields.Binary(string='00_BazaProiect.xlsx (editat)', required=True, attachment=False)
+    upload_filename = fields.Char(string='Nume fișier')
+
+    state = fields.Selection([
+        ('draft', 'Încărcare'),
+        ('preview', 'Verificare'),
+        ('done', 'Aplicat'),
+    ], string='Stare', default='draft', readonly=True)
+
+    report = fields.Text(string='Raport modificări', readonly=True)
+    change_count = fields.Integer(string='Înregistrări modificate', readonly=True)
+    error_count = fields.Integer(string='Erori', readonly=True)
+
+    # ----------------------------
+    # Citire workbook (read-only, rând cu rând)
+    # ----------------------------
+    @api.model
+    def _read_sheet(self, worksheet, id_column, columns):
+        """{id: {câmp: valoare brută}} pentru rândurile foii care au id > 0."""
+        rows = worksheet.iter_rows(values_only=True)
+        positions = None
+        for _index, row in zip(range(HEADER_SCAN_ROWS), rows):
+            cells = [_cell_text(cell) for cell in row]
+            if id_column in cells:
+                positions = {header: cells.index(header) for header, _f, _k in columns if header in cells}
+                positions[id_column] = cells.index(id_column)
+                break
+        if positions is None:
+            return {}
+
+        result = {}
+        id_pos = positions.pop(id_column)
+        for row in rows:
+            if id_pos >= len(row):
+                continue
+            try:
+                rec_id = int(_cell_float(row[id_pos]))
+            except ValueError:
+                continue
+            if rec_id <= 0:
+                continue
+            result[rec_id] = {
+                fname: row[positions[header]] if positions[header] < len(row) else None
+                for header, fname, _kind in columns
+                if header in positions
+            }
+        return result
+
+    @api.model
+    def _convert(self, model, fname, kind, raw):
+        if kind == 'float':
+            return _cell_float(raw)
+        if kind == 'date':
+            return _cell_date(raw)
+        text = _cell_text(raw)
+        if kind == 'selection':
+            if not text:
+                return False
+            field = model._fields[fname]
+            for key, label in field._description_selection(self.env):
+                if text.casefold() in (key.casefold(), (label or '').casefold()):
+                    return key
+            raise ValueError("valoare necunoscută pentru %s: %s" % (field.string, text))
+        return text or False
+
+    @api.model
+    def _differs(self, model, fname, kind, old, new):
+        if kind == 'float':
+            digits = 2 if model._fields[fname].type == 'monetary' else 6
+            return round(old or 0.0, digits) != round(new or 0.0, digits)
+        if kind == 'char':
+            return _cell_text(old) != _cell_text(new)
+        return (old or False) != (new or False)
+
+    # ----------------------------
+    # Diff pe id-uri (o citire per foaie)
+    # ----------------------------
+    def _compute_changes(self):
+        """[(model, {vals: ids})], raport, erori; nu scrie nimic."""
+        self.ensure_one()
+        try:
+            import openpyxl
+        except ImportError as e:
+            raise ValidationError(_(
+                "Lipsește librăria Python 'openpyxl'.\n"
+                "Instalează pachetul 'openpyxl' pe server și reîncearcă."
+            )) from e
+
+        data = base64.b64decode(self.upload or b'')
+        try:
+            workbook = openpyxl.load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+        except Exception as e:
+            raise ValidationError(_("Fișierul nu este un XLSX valid.\n\nEroare: %s") % str(e)) from e
+
+        plan = []
+        report = []
+        errors = 0
+        try:
+            for sheet, model_name, id_column, columns, vat_rules in REIMPORT_SHEETS:
+                if sheet not in workbook.sheetnames:
+                    continue
+                rows = self._read_sheet(workbook[sheet], id_column, columns)
+                if not rows:
+                    continue
+
+                Model = self.env[model_name]
+                kinds = {fname: kind for _h, fname, kind in columns}
+                labels = {fname: header for header, fname, _k in columns}
+                read_fnames = set(kinds)
+                for vat_fname, base_fname, rate_fname, manual_fname in vat_rules:
+                    read_fnames |= {vat_fname, base_fname, rate_fname, manual_fname}
+
+                records = Model.search_fetch(
+                    [('id', 'in', list(rows)), ('implementation_id', '=', self.implementation_id.id)],
+                    list(read_fnames),
+                )
+                unknown = set(rows) - set(records.ids)
+                if unknown:
+                    errors += len(unknown)
+                    report.append(_("%(sheet)s: id-uri inexistente în implementare: %(ids)s") % {
+                        'sheet': sheet, 'ids': ", ".join(map(str, sorted(unknown)[:20])),
+                    })
+
+                by_vals = defaultdict(list)
+                for rec in records:
+                    try:
+                        new_values = {
+                            fname: self._convert(Model, fname, kinds[fname], raw)
+                            for fname, raw in rows[rec.id].items()
+                        }
+                    except ValueError as exc:
+                        errors += 1
+                        report.append(_("%(sheet)s #%(id)s: %(reason)s") % {'sheet': sheet, 'id': rec.id, 'reason': exc})
+                        continue
+
+                    vals = {
+                        fname: value for fname, value in new_values.items()
+                        if self._differs(Model, fname, kinds[fname], rec[fname], value)
+                    }
+                    for vat_fname, base_fname, rate_fname, manual_fname in vat_rules:
+                        if vat_fname in vals:
+                            vals[manual_fname] = True
+                        elif (base_fname in vals or rate_fname in vals) and not rec[manual_fname]:
+                            base = vals.get(base_fname, rec[base_fname]) or 0.0
+                            rate = vals.get(rate_fname, rec[rate_fname]) or 0.0
+                            vals[vat_fname] = round(base * rate / 100.0, 2)
+                    if not vals:
+                        continue
+
+                    by_vals[tuple(sorted(vals.items()))].append(rec.id)
+                    changes = ", ".join(
+                        "%s: %s -> %s" % (labels.get(fname, fname), rec[fname], value)
+                        for fname, value in vals.items()
+                        if fname in kinds or fname in labels
+                    )
+                    report.append("%s #%s: %s" % (sheet, rec.id, changes))
+
+                if by_vals:
+                    plan.append((model_name, by_vals))
+        finally:
+            workbook.close()
+
+        return plan, report, errors
+
+    def _reopen(self):
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Reimport 00_BazaProiect'),
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+    # ----------------------------
+    # Acțiuni
+    # ----------------------------
+    def action_preview(self):
+        """Dry-run: raportul diferențelor dintre workbook și baza de date."""
+        self.ensure_one()
+        plan, report, errors = self._compute_changes()
+        self.write({
+            'state': 'preview',
+            'report': "\n".join(report) or _("Nicio modificare."),
+            'change_count': sum(len(ids) for _m, by_vals in plan for ids in by_vals.values()),
+            'error_count': errors,
+        })
+        return self._reopen()
+
+    def _affected_contracts(self, plan):
+        """Contractele ale căror documente / linii de document se schimbă în plan.
+
+        Ca în formularul documentului (enforce_document_contract_ceiling), plafonul se verifică
+        doar când se modifică documente; o foaie care schimbă doar contracte / linii de contract
+        nu e respinsă pentru un contract pe care UI-ul îl acceptă.
+        """
+        contract_ids = set()
+        for model_name, by_vals in plan:
+            if model_name not in ('project.document', 'project.document.line'):
+                continue
+            for vals_items, ids in by_vals.items():
+                contract_ids.update(self.env[model_name].browse(ids).contract_id.ids)
+                new_contract_id = dict(vals_items).get('contract_id')
+                if new_contract_id:
+                    contract_ids.add(new_contract_id)
+        return self.env['project.contract'].browse(sorted(contract_ids))
+
+    def _check_contract_ceilings(self, contracts):
+        """Aceeași regulă ca la salvarea documentului: totalul documentelor nu depășește contractul."""
+        if not contracts:
+            return
+        self.env.flush_all()
+        contracts.invalidate_recordset(['documents_amount_total', 'amount_total'])
+        over = contracts.filtered(lambda c: (c.documents_amount_total or 0.0) > (c.amount_total or 0.0) + 0.0001)
+        if over:
+            raise ValidationError(_(
+                "Reimportul depășește valoarea contractului; nu s-a aplicat nimic:\n%s"
+            ) % "\n".join(
+                "%s: documente %.2f > contract %.2f" % (
+                    c.contract_number or c.contract_name, c.documents_amount_total, c.amount_total,
+                )
+                for c in over
+            ))
+
+    def action_apply(self):
+        """Scrie doar câmpurile modificate; înregistrările cu aceleași valori noi într-un singur write()."""
+        self.ensure_one()
+        plan, report, errors = self._compute_changes()
+        if errors:
+            raise ValidationError(_(
+                "Workbook-ul are %s erori; nu s-a aplicat nimic. Rulează verificarea pentru detalii."
+            ) % errors)
+
+        # write-urile directe ocolesc verificarea de plafon din formular: blocăm ledger-ul
+        # contractelor atinse înainte de scriere și verificăm plafonul după
+        contracts = self._affected_contracts(plan)
+        contracts._lock_documents_ledger()
+
+        changed = 0
+        for model_name, by_vals in plan:
+            Model = self.env[model_name]
+            for vals_items, ids in by_vals.items():
+                Model.browse(ids).write(dict(vals_items))
+                changed += len(ids)
+
+        self._check_contract_ceilings(contracts)
+
+        _logger.info("Reimport 00_BazaProiect impl=%s: %s înregistrări modificate", self.implementation_id.id, changed)
+        self.write({
+            'state': 'done',
+            'report': "\n".join(report) or _("Nicio modificare."),
+            'change_count': changed,
+            'error_count': 0,
+        })
+        return self._reopen()
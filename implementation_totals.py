@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+from collections import namedtuple
+
+from odoo import models, api
+from odoo.tools import SQL
+
+
+# coloanele de plan ale unei linii de deviz (din devizul funding; text din linia proxy dacă există)
+BudgetPlan = namedtuple('BudgetPlan', [
+    'funding_budget_line_id', 'nr_crt', 'chapter', 'subchapter', 'name',
+    'elig_base', 'elig_vat', 'elig_total',
+    'neelig_base', 'neelig_vat', 'neelig_total',
+    'total',
+])
+EMPTY_BUDGET_PLAN = BudgetPlan(0, '', '', '', '', 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+
+class FundingSnapshot:
+    """Coeficienții de aport și valorile de plan (deviz funding) ale unui lot de implementări.
+
+    Se încarcă o singură dată (vezi `_funding_snapshot`) și se citește din dicționare în
+    compute-uri și exporturi, în loc de lanțuri implementation -> funding -> aport_coef /
+    budget line -> funding budget line -> chelt_elig_* parcurse pe fiecare linie.
+    """
+    __slots__ = ('aport_by_impl', 'plan_by_budget_line')
+
+    def __init__(self, aport_by_impl, plan_by_budget_line):
+        self.aport_by_impl = aport_by_impl
+        self.plan_by_budget_line = plan_by_budget_line
+
+    def aport_coef(self, implementation_id):
+        return self.aport_by_impl.get(implementation_id, 0.0)
+
+    def neramb_coef(self, implementation_id):
+        return max(0.0, 1.0 - self.aport_coef(implementation_id))
+
+    def plan(self, budget_line_id):
+        """BudgetPlan (eligibil / neeligibil / total) din devizul funding al liniei proxy."""
+        return self.plan_by_budget_line.get(budget_line_id, EMPTY_BUDGET_PLAN)
+
+
+class ProjectImplementationTotals(models.AbstractModel):
+    """Agregări pe linie de deviz / linie de document, cu un singur GROUP BY per nivel.
+
+    Folosit de agregatele stocate pe liniile de deviz, de panourile din liniile de
+    decontare și (indirect) de exporturile XLSX. Costul depinde de numărul de chei
+    cerute, nu de numărul de linii de tranzacție.
+    """
+    _name = 'project.implementation.totals'
+    _description = 'Agregări implementare (SQL)'
+
+    # ----------------------------
+    # Helpers
+    # ----------------------------
+    @api.model
+    def _sum_by(self, model_name, key, ids, fnames):
+        """{id cheie: (sumă fname1, sumă fname2, ...)} pe coloana stocată `key` a modelului."""
+        ids = [i for i in set(ids) if i]
+        if not ids:
+            return {}
+        groups = self.env[model_name]._read_group(
+            [(key, 'in', ids)],
+            [key],
+            ['%s:sum' % fname for fname in fnames],
+        )
+        return {
+            group_rec.id: tuple(value or 0.0 for value in values)
+            for group_rec, *values in groups
+        }
+
+    @api.model
+    def _funding_snapshot(self, implementation_ids, budget_line_ids=()):
+        """FundingSnapshot pentru implementări: o citire pe funding și (opțional) una pe deviz.
+
+        Planul se încarcă doar pentru liniile de deviz din `budget_line_ids` (cele afișate /
+        exportate), nu pentru tot devizul implementării.
+        """
+        implementation_ids = [i for i in set(implementation_ids) if i]
+        implementations = self.env['project.implementation'].browse(implementation_ids)
+
+        fundings = implementations.funding_project_id
+        fundings.fetch(['aport_coef'])
+        aport_by_funding = {funding.id: funding.aport_coef or 0.0 for funding in fundings}
+        aport_by_impl = {
+            impl.id: aport_by_funding.get(impl.funding_project_id.id, 0.0)
+            for impl in implementations
+        }
+
+        plan_by_budget_line = {}
+        budget_line_ids = [i for i in set(budget_line_ids) if i]
+        if budget_line_ids:
+            budget_lines = self.env['project.implementation.budget.line'].browse(budget_line_ids)
+            budget_lines.fetch([
+                'funding_budget_line_id', 'chapter', 'subchapter', 'name', 'total_eligibil', 'total_neeligibil',
+            ])
+            budget_lines.funding_budget_line_id.fetch([
+                'nr_crt', 'chapter', 'subchapter', 'name',
+                'chelt_elig_baza', 'chelt_elig_tva', 'total_eligibil',
+                'chelt_neelig_baza', 'chelt_neelig_tva', 'total_neeligibil',
+                'total',
+            ])
+            for line in budget_lines:
+                fb = line.funding_budget_line_id
+                if fb:
+                    plan_by_budget_line[line.id] = BudgetPlan(
+                        fb.id,
+                        fb.nr_crt or '',
+                        line.chapter or fb.chapter or '',
+                        line.subchapter or fb.subchapter or '',
+                        line.name or fb.name or '',
+                        fb.chelt_elig_baza or 0.0,
+                        fb.chelt_elig_tva or 0.0,
+                        fb.total_eligibil or 0.0,
+                        fb.chelt_neelig_baza or 0.0,
+                        fb.chelt_neelig_tva or 0.0,
+                        fb.total_neeligibil or 0.0,
+                        fb.total or 0.0,
+                    )
+                else:
+                    # linie fără deviz funding: doar totalurile proxy, ca în exporturile vechi
+                    elig_total = line.total_eligibil or 0.0
+                    neelig_total = line.total_neeligibil or 0.0
+                    plan_by_budget_line[line.id] = EMPTY_BUDGET_PLAN._replace(
+                        chapter=line.chapter or '',
+                        subchapter=line.subchapter or '',
+                        name=line.name or '',
+                        elig_total=elig_total,
+                        neelig_total=neelig_total,
+                        total=elig_total + neelig_total,
+                    )
+        return FundingSnapshot(aport_by_impl, plan_by_budget_line)
+
+    @api.model
+    def _lock_ledger_rows(self, model_name, ids):
+        """Serializează scriitorii pe aceleași rânduri-ledger (contract / linie document).
+
+        Rândurile se blochează în ordinea id-urilor (fără deadlock între loturi) și se
+        marchează ca modificate: o tranzacție concurentă care blochează aceleași rânduri
+        primește eroare de serializare și e reluată de Odoo cu un snapshot proaspăt,
+        deci vede sumele deja înregistrate. Rândurile altor contracte nu sunt atinse.
+        """
+        ids = sorted({i for i in ids if i})
+        if not ids:
+            return
+        table = SQL.identifier(self.env[model_name]._table)
+        self.env.execute_query(SQL(
+            "SELECT id FROM %s WHERE id IN %s ORDER BY id FOR UPDATE",
+            table, tuple(ids),
+        ))
+        self.env.execute_query(SQL(
+            "UPDATE %s SET write_date = write_date WHERE id IN %s",
+            table, tuple(ids),
+        ))
+
+    # ----------------------------
+    # Contracte (pe linie deviz)
+    # ----------------------------
+    @api.model
+    def _contract_totals_by_budget_line(self, budget_line_ids):
+        """{budget_line_id: (bază, TVA, total)}."""
+        return self._sum_by(
+            'project.contract.line', 'budget_proxy_line_id', budget_line_ids,
+            ['base_amount', 'vat_amount', 'total_amount'],
+        )
+
+    # ----------------------------
+    # Documente (pe linie deviz)
+    # ----------------------------
+    @api.model
+    def _document_totals_by_budget_line(self, budget_line_ids):
+        """{budget_line_id: (eligibil bază, eligibil TVA, neeligibil bază, neeligibil TVA)}."""
+        return self._sum_by(
+            'project.document.line', 'budget_proxy_line_id', budget_line_ids,
+            ['elig_base_amount', 'elig_vat_amount', 'neelig_base_amount', 'neelig_vat_amount'],
+        )
+
+    # ----------------------------
+    # Decontări (pe linie deviz / pe linie document)
+    # ----------------------------
+    @api.model
+    def _settlement_totals_by_budget_line(self, budget_line_ids):
+        """{budget_line_id: (bază decontată, TVA decontat)}."""
+        return self._sum_by(
+            'project.settlement.line', 'budget_proxy_line_id', budget_line_ids,
+            ['elig_base_amount', 'elig_vat_amount'],
+        )
+
+    # ----------------------------
+    # Contractat pe achiziție (funding)
+    # ----------------------------
+    @api.model
+    def _contract_totals_by_acquisition(self, implementation_ids):
+        """{(implementation_id, acquisition_id): (bază, TVA)} din totalurile stocate ale contractelor."""
+        implementation_ids = [i for i in set(implementation_ids) if i]
+        if not implementation_ids:
+            return {}
+        groups = self.env['project.contract']._read_group(
+            [('implementation_id', 'in', implementation_ids), ('acquisition_id', '!=', False)],
+            ['implementation_id', 'acquisition_id'],
+            ['amount_base_total:sum', 'amount_vat_total:sum'],
+        )
+        return {
+            (impl.id, acquisition.id): (base or 0.0, vat or 0.0)
+            for impl, acquisition, base, vat in groups
+        }
+
+    # ----------------------------
+    # Perioada contractelor pe activitate (funding)
+    # ----------------------------
+    @api.model
+    def _contract_date_bounds_by_activity(self, implementation_ids):
+        """{(implementation_id, activity_id): (MIN start_date, MAX end_date)}."""
+        implementation_ids = [i for i in set(implementation_ids) if i]
+        if not implementation_ids:
+            return {}
+        groups = self.env['project.contract']._read_group(
+            [('implementation_id', 'in', implementation_ids), ('activity_id', '!=', False)],
+            ['implementation_id', 'activity_id'],
+            ['start_date:min', 'end_date:max'],
+        )
+        return {
+            (impl.id, activity.id): (min_start, max_end)
+            for impl, activity, min_start, max_end in groups
+        }
+
+    @api.model
+    def _settlement_totals_by_document_line(self, document_line_ids):
+        """{document_line_id: (bază decontată, TVA decontat)}."""
+        return self._sum_by(
+            'project.settlement.line', 'document_line_id', document_line_ids,
+            ['elig_base_amount', 'elig_vat_amount'],
+        )
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+Backfill pentru cheile denormalizate (implementation_id / budget_proxy_line_id)
+pe liniile de contract, document și decontare.
+
+Coloanele sunt create și completate direct în SQL înainte de încărcarea
+modelelor, ca ORM-ul să nu le mai recalculeze rând cu rând la upgrade.
+Indexurile și cheile străine sunt adăugate apoi de ORM.
+"""
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def _add_column(cr, table, column):
+    cr.execute(f'ALTER TABLE "{table}" ADD COLUMN IF NOT EXISTS "{column}" integer')
+
+
+def migrate(cr, version):
+    if not version:
+        return
+
+    # linii contract: implementation_id = contract.implementation_id
+    _add_column(cr, 'project_contract_line', 'implementation_id')
+    cr.execute("""
+        UPDATE project_contract_line cl
+           SET implementation_id = c.implementation_id
+          FROM project_contract c
+         WHERE c.id = cl.contract_id
+           AND cl.implementation_id IS DISTINCT FROM c.implementation_id
+    """)
+    _logger.info("project_contract_line.implementation_id: %s rânduri completate", cr.rowcount)
+
+    # linii document: implementation_id = document.implementation_id,
+    #                 budget_proxy_line_id = contract_line.budget_proxy_line_id
+    _add_column(cr, 'project_document_line', 'implementation_id')
+    _add_column(cr, 'project_document_line', 'budget_proxy_line_id')
+    cr.execute("""
+        UPDATE project_document_line dl
+           SET implementation_id = d.implementation_id,
+               budget_proxy_line_id = cl.budget_proxy_line_id
+          FROM project_document d, project_contract_line cl
+         WHERE d.id = dl.document_id
+           AND cl.id = dl.contract_line_id
+    """)
+    _logger.info("project_document_line: %s rânduri completate", cr.rowcount)
+
+    # linii decontare: implementation_id = settlement.implementation_id,
+    #                  budget_proxy_line_id = document_line.budget_proxy_line_id
+    _add_column(cr, 'project_settlement_line', 'implementation_id')
+    _add_column(cr, 'project_settlement_line', 'budget_proxy_line_id')
+    cr.execute("""
+        UPDATE project_settlement_line sl
+           SET implementation_id = s.implementation_id,
+               budget_proxy_line_id = dl.budget_proxy_line_id
+          FROM project_settlement s, project_document_line dl
+         WHERE s.id = sl.settlement_id
+           AND dl.id = sl.document_line_id
+    """)
+    _logger.info("project_settlement_line: %s rânduri completate", cr.rowcount)
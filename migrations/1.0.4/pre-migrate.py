@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Backfill pentru coloanele mirror stocate pe liniile proxy (deviz / achiziții / activități).
+
+Coloana proxy este creată și completată în SQL doar dacă sursa din project_funding
+este stocată; altfel o lăsăm ORM-ului, care o calculează la upgrade.
+"""
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# (tabel proxy, coloană FK spre funding, tabel funding, [(coloană proxy, coloană funding, tip SQL)])
+MIRRORS = [
+    ('project_implementation_budget_line', 'funding_budget_line_id', 'project_budget', [
+        ('chapter', 'chapter', 'varchar'),
+        ('subchapter', 'subchapter', 'varchar'),
+        ('name', 'name', 'varchar'),
+        ('total_eligibil', 'total_eligibil', 'float8'),
+        ('total_neeligibil', 'total_neeligibil', 'float8'),
+    ]),
+    ('project_implementation_acquisition_line', 'funding_acquisition_id', 'project_acquisition', [
+        ('name', 'name', 'varchar'),
+        ('code', 'code', 'varchar'),
+        ('sequence', 'sequence', 'int4'),
+        ('date_start', 'date_start', 'date'),
+        ('date_end', 'date_end', 'date'),
+        ('deviz_baza', 'baza', 'float8'),
+        ('deviz_tva', 'tva', 'float8'),
+    ]),
+    ('project_implementation_activity_line', 'funding_activity_id', 'project_activity', [
+        ('name', 'name', 'varchar'),
+        ('sequence', 'sequence', 'int4'),
+        ('date_start', 'date_start', 'date'),
+        ('date_end', 'date_end', 'date'),
+    ]),
+]
+
+
+def _column_exists(cr, table, column):
+    cr.execute("""
+        SELECT 1
+          FROM information_schema.columns
+         WHERE table_name = %s AND column_name = %s
+    """, (table, column))
+    return bool(cr.fetchone())
+
+
+def migrate(cr, version):
+    if not version:
+        return
+
+    for proxy_table, fk_column, source_table, columns in MIRRORS:
+        assignments = []
+        for proxy_column, source_column, sql_type in columns:
+            if _column_exists(cr, proxy_table, proxy_column):
+                continue
+            if not _column_exists(cr, source_table, source_column):
+                _logger.info("%s.%s: sursa %s.%s nu e stocată, o calculează ORM-ul",
+                             proxy_table, proxy_column, source_table, source_column)
+                continue
+            cr.execute(f'ALTER TABLE "{proxy_table}" ADD COLUMN "{proxy_column}" {sql_type}')
+            assignments.append(f'"{proxy_column}" = f."{source_column}"')
+
+        if not assignments:
+            continue
+
+        cr.execute(f"""
+            UPDATE "{proxy_table}" p
+               SET {', '.join(assignments)}
+              FROM "{source_table}" f
+             WHERE f.id = p."{fk_column}"
+        """)
+        _logger.info("%s: %s rânduri completate (%s coloane mirror)", proxy_table, cr.rowcount, len(assignments))
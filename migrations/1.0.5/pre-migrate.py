@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+"""
+Backfill pentru project_document_line.contract_id (denormalizat din document),
+cheia ledger-ului de documente pe contract.
+"""
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    if not version:
+        return
+
+    cr.execute('ALTER TABLE "project_document_line" ADD COLUMN IF NOT EXISTS "contract_id" integer')
+    cr.execute("""
+        UPDATE project_document_line dl
+           SET contract_id = d.contract_id
+          FROM project_document d
+         WHERE d.id = dl.document_id
+           AND dl.contract_id IS DISTINCT FROM d.contract_id
+    """)
+    _logger.info("project_document_line.contract_id: %s rânduri completate", cr.rowcount)
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+Raport duplicate (contract_id, budget_proxy_line_id) pe project_contract_line,
+înainte de crearea indexului unic uniq_contract_budget_proxy_line.
+
+Duplicatele NU se șterg automat (liniile pot avea documente asociate); cât timp
+există, Odoo nu poate crea constrângerea și o semnalează în log la upgrade.
+"""
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    if not version:
+        return
+
+    cr.execute("""
+        SELECT contract_id, budget_proxy_line_id, array_agg(id ORDER BY id)
+          FROM project_contract_line
+         WHERE contract_id IS NOT NULL
+           AND budget_proxy_line_id IS NOT NULL
+         GROUP BY contract_id, budget_proxy_line_id
+        HAVING count(*) > 1
+    """)
+    duplicates = cr.fetchall()
+    if not duplicates:
+        _logger.info("project_contract_line: nicio linie de deviz duplicată pe contract")
+        return
+
+    _logger.warning(
+        "project_contract_line: %s perechi (contract, linie deviz) duplicate; "
+        "indexul unic nu poate fi creat până la corectarea lor manuală",
+        len(duplicates),
+    )
+    for contract_id, budget_line_id, line_ids in duplicates:
+        _logger.warning(
+            "  contract_id=%s budget_proxy_line_id=%s linii contract=%s",
+            contract_id, budget_line_id, line_ids,
+        )
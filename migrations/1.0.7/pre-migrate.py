@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+Duplicate pe liniile proxy înainte de constrângerile unique (implementation_id, funding_*),
+pe care se bazează INSERT ... ON CONFLICT din _sync_proxies_from_funding.
+
+- achiziții / activități: liniile proxy nu sunt referite de alte tabele, deci duplicatele
+  se șterg (se păstrează linia cu id-ul cel mai mic);
+- deviz: liniile proxy sunt referite de liniile de contract / document / decontare, deci
+  duplicatele doar se raportează; cât timp există, constrângerea nu poate fi creată.
+"""
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# (tabel proxy, coloană funding, se pot șterge duplicatele)
+PROXY_TABLES = [
+    ('project_implementation_acquisition_line', 'funding_acquisition_id', True),
+    ('project_implementation_activity_line', 'funding_activity_id', True),
+    ('project_implementation_budget_line', 'funding_budget_line_id', False),
+]
+
+
+def _table_exists(cr, table):
+    cr.execute("SELECT 1 FROM information_schema.tables WHERE table_name = %s", (table,))
+    return bool(cr.fetchone())
+
+
+def migrate(cr, version):
+    if not version:
+        return
+
+    for table, funding_column, can_delete in PROXY_TABLES:
+        if not _table_exists(cr, table):
+            continue
+
+        cr.execute("""
+            SELECT implementation_id, {col}, array_agg(id ORDER BY id)
+              FROM {table}
+             WHERE implementation_id IS NOT NULL
+               AND {col} IS NOT NULL
+             GROUP BY implementation_id, {col}
+            HAVING count(*) > 1
+        """.format(table=table, col=funding_column))
+        duplicates = cr.fetchall()
+        if not duplicates:
+            continue
+
+        if can_delete:
+            extra_ids = [line_id for _impl, _funding, ids in duplicates for line_id in ids[1:]]
+            cr.execute("DELETE FROM {table} WHERE id IN %s".format(table=table), (tuple(extra_ids),))
+            _logger.warning(
+                "%s: %s linii proxy duplicate șterse (păstrată linia cu id minim): %s",
+                table, len(extra_ids), extra_ids,
+            )
+            continue
+
+        _logger.warning(
+            "%s: %s perechi (implementare, %s) duplicate; constrângerea unique și sincronizarea "
+            "din funding nu funcționează până la corectarea lor manuală",
+            table, len(duplicates), funding_column,
+        )
+        for impl_id, funding_id, line_ids in duplicates:
+            _logger.warning("  implementation_id=%s %s=%s linii=%s", impl_id, funding_column, funding_id, line_ids)
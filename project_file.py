@@ -1,11 +1,28 @@
 # -*- coding: utf-8 -*-
 import os
 import re
+import io
 import base64
+import shutil
+from functools import partial
+from urllib.parse import urlencode
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
 
 
+# dimensiunea bucăților copiate pe disk la upload (fișierul nu se ține întreg în memorie)
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def _remove_file_quietly(path):
+    """Șterge un fișier scris de upload dacă tranzacția nu se mai salvează."""
+    if path and os.path.isfile(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
 def _safe_filename(name: str) -> str:
     name = (name or '').strip()
     name = re.sub(r'[\\/:*?"<>|]+', '_', name)  # windows forbidden
@@ -202,38 +219,91 @@ class ProjectFile(models.Model):
     # =========================================================
     # Disk operations
     # =========================================================
-    def _save_upload_to_disk_and_clear(self):
-        self.ensure_one()
-        if not self.upload:
-            return
+    def _write_stream_to_disk(self, stream):
+        """Copiază stream-ul în folderul categoriei, pe bucăți, și întoarce calea pe disk.
 
+        Se scrie întâi într-un fișier temporar din același folder, apoi se redenumește:
+        un upload întrerupt nu lasă pe disk un fișier trunchiat sub numele standard.
+        """
+        self.ensure_one()
         folder = self._get_category_folder()
 
         filename = self.standard_filename or _safe_filename(self.upload_filename or self.original_filename or 'fisier')
         full_path = os.path.join(folder, filename)
+        tmp_path = full_path + '.part'
 
         try:
-            data = base64.b64decode(self.upload)
+            with open(tmp_path, 'wb') as f:
+                shutil.copyfileobj(stream, f, UPLOAD_CHUNK_SIZE)
+            os.replace(tmp_path, full_path)
+            # dacă tranzacția cade ulterior, înregistrarea dispare -> ștergem și fișierul
+            self.env.cr.postrollback.add(partial(_remove_file_quietly, full_path))
         except Exception as e:
-            raise ValidationError(_("Fișier invalid (base64 decode a eșuat): %s") % e)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise ValidationError(_("Nu pot scrie fișierul pe disk:\n%s\n%s") % (full_path, e))
+        return full_path
+
+    def _store_stream(self, stream, filename):
+        """Salvează pe disk un upload primit ca stream (ruta HTTP), fără binar în DB."""
+        self.ensure_one()
+        full_path = self._write_stream_to_disk(stream)
+        try:
+            self.sudo().write({
+                'stored_path': full_path,
+                'original_filename': filename or os.path.basename(full_path),
+            })
+        except Exception:
+            # înregistrarea nu se salvează -> nu lăsăm pe disk un fișier orfan
+            _remove_file_quietly(full_path)
+            raise
+
+    def _save_upload_to_disk_and_clear(self):
+        self.ensure_one()
+        if not self.upload:
+            return
 
         try:
-            with open(full_path, 'wb') as f:
-                f.write(data)
+            data = base64.b64decode(self.upload)
         except Exception as e:
-            raise ValidationError(_("Nu pot scrie fișierul pe disk:\n%s\n%s") % (full_path, e))
+            raise ValidationError(_("Fișier invalid (base64 decode a eșuat): %s") % e)
+
+        full_path = self._write_stream_to_disk(io.BytesIO(data))
+        filename = os.path.basename(full_path)
 
         # curățăm binarul din DB
-        self.sudo().write({
-            'stored_path': full_path,
-            'original_filename': self.upload_filename or self.original_filename or filename,
-            'upload': False,
-            'upload_filename': False,
-        })
+        try:
+            self.sudo().write({
+                'stored_path': full_path,
+                'original_filename': self.upload_filename or self.original_filename or filename,
+                'upload': False,
+                'upload_filename': False,
+            })
+        except Exception:
+            _remove_file_quietly(full_path)
+            raise
 
     # =========================================================
     # Actions
     # =========================================================
+    def action_upload(self):
+        """Înlocuiește fișierul prin pagina de upload în streaming (nu prin câmpul base64 `upload`)."""
+        self.ensure_one()
+        params = {
+            'implementation_id': self.implementation_id.id,
+            'category': self.category or 'other',
+            'res_model': self.res_model or '',
+            'res_id': self.res_id or '',
+            'file_id': self.id,
+        }
+        return {
+            'type': 'ir.actions.act_url',
+            'url': '/project_files/upload/form?%s' % urlencode(params),
+            'target': 'self',
+        }
+
     def action_download(self):
         self.ensure_one()
         if not self.stored_path:
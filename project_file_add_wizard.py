@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
-from odoo import models, fields, api, _
-from odoo.exceptions import ValidationError
+from urllib.parse import urlencode
+
+from odoo import models, fields
 
 
 class ProjectFileAddWizard(models.TransientModel):
@@ -22,38 +23,22 @@ class ProjectFileAddWizard(models.TransientModel):
     res_model = fields.Char(string='Model', required=True, readonly=True)
     res_id = fields.Integer(string='ID în model', required=True, readonly=True)
 
-    upload = fields.Binary(string='Fișier', required=True, attachment=False)
-    upload_filename = fields.Char(string='Nume fișier')
-
     note = fields.Text(string='Observații')
 
     def action_create_file(self):
+        """Deschide pagina de upload: fișierul se trimite multipart pe /project_files/upload și se
+        scrie pe disk pe bucăți, fără base64 prin JSON-RPC (fișiere de sute de MB)."""
         self.ensure_one()
-        if not self.upload:
-            raise ValidationError(_("Selectează un fișier."))
-
-        vals = {
+        params = {
             'implementation_id': self.implementation_id.id,
             'category': self.category,
             'res_model': self.res_model,
             'res_id': self.res_id,
-            'upload': self.upload,
-            'upload_filename': self.upload_filename,
-            'note': self.note,
         }
-        pf = self.env['project.file'].create(vals)
-
-        # Redeschide lista filtrată pe aceeași “origine”
+        if self.note:
+            params['note'] = self.note
         return {
-            'type': 'ir.actions.act_window',
-            'name': _('Fișiere'),
-            'res_model': 'project.file',
-            'view_mode': 'list,form',
-            'domain': [
-                ('implementation_id', '=', self.implementation_id.id),
-                ('res_model', '=', self.res_model),
-                ('res_id', '=', self.res_id),
-            ],
-            'context': dict(self.env.context),
-            'target': 'current',
+            'type': 'ir.actions.act_url',
+            'url': '/project_files/upload/form?%s' % urlencode(params),
+            'target': 'self',
         }
\ No newline at end of file
@@ -1,7 +1,13 @@
 # -*- coding: utf-8 -*-
 import os
-from odoo import http
+from odoo import http, _
+from odoo.exceptions import AccessError, ValidationError
 from odoo.http import request
+from odoo.tools import config
+
+# limita corpului cererii pentru upload (implicit Odoo: 128 MiB); configurabilă în odoo.conf
+# prin `project_files_max_upload_size` (octeți)
+MAX_UPLOAD_SIZE = int(config.get('project_files_max_upload_size') or 512 * 1024 * 1024)
 
 
 class ProjectFilesController(http.Controller):
@@ -24,4 +30,93 @@ class ProjectFilesController(http.Controller):
             ('Content-Type', 'application/octet-stream'),
             ('Content-Disposition', f'attachment; filename="{filename}"'),
         ]
-        return request.make_response(content, headers=headers)
\ No newline at end of file
+        return request.make_response(content, headers=headers)
+
+    @http.route('/project_files/upload/form', type='http', auth='user', methods=['GET'])
+    def upload_project_file_form(self, implementation_id, category='other', res_model=None, res_id=None,
+                                 note=None, file_id=None, **kwargs):
+        """Pagina de upload deschisă din wizard / formularul fișierului: POST multipart pe ruta de mai jos,
+        deci fișierul nu mai trece prin JSON-RPC ca base64."""
+        implementation = request.env['project.implementation'].browse(int(implementation_id)).exists()
+        if not implementation:
+            return request.not_found()
+        implementation.check_access('read')
+        return self._render_upload_form(implementation, category, res_model, res_id, note, file_id)
+
+    def _render_upload_form(self, implementation, category, res_model, res_id, note, file_id, error=None):
+        return request.render('project_implementation.project_file_upload_page', {
+            'implementation': implementation,
+            'category': category or 'other',
+            'res_model': res_model or 'project.implementation',
+            'res_id': res_id or implementation.id,
+            'note': note or '',
+            'file_id': file_id or '',
+            'max_upload_mb': MAX_UPLOAD_SIZE // (1024 * 1024),
+            'error': error,
+        }, status=400 if error else 200)
+
+    @http.route('/project_files/upload', type='http', auth='user', methods=['POST'],
+                max_content_length=MAX_UPLOAD_SIZE)
+    def upload_project_file(self, implementation_id, category='other', res_model=None, res_id=None,
+                            note=None, ufile=None, file_id=None, redirect=None, **kwargs):
+        """Upload multipart (câmpul `ufile`) scris direct în folderul categoriei.
+
+        Werkzeug păstrează corpul cererii într-un fișier temporar (nu în memorie), iar
+        conținutul e copiat pe bucăți pe disk; în project.file rămâne doar calea.
+        Dimensiunea maximă a cererii: MAX_UPLOAD_SIZE.
+        Parametri: implementation_id, category, res_model, res_id, note, csrf_token;
+        `file_id` înlocuiește fișierul unei înregistrări existente; cu `redirect` (pagina de
+        upload) răspunsul e redirect spre fișier / pagina cu eroarea, altfel JSON.
+        """
+        def _error(message, status=400):
+            if redirect:
+                implementation = request.env['project.implementation'].browse(int(implementation_id)).exists()
+                if implementation:
+                    return self._render_upload_form(
+                        implementation, category, res_model, res_id, note, file_id, error=message,
+                    )
+            return request.make_json_response({'error': message}, status=status)
+
+        if ufile is None or not getattr(ufile, 'filename', None):
+            return _error(_("Lipsește fișierul (câmpul 'ufile')."))
+
+        stored_path = None
+        try:
+            implementation = request.env['project.implementation'].browse(int(implementation_id)).exists()
+            if not implementation:
+                return request.not_found()
+            implementation.check_access('read')
+
+            if file_id:
+                rec = request.env['project.file'].browse(int(file_id)).exists()
+                if not rec or rec.implementation_id != implementation:
+                    return request.not_found()
+                rec.check_access('write')
+            else:
+                rec = request.env['project.file'].create({
+                    'implementation_id': implementation.id,
+                    'category': category or 'other',
+                    'res_model': res_model or 'project.implementation',
+                    'res_id': int(res_id) if res_id else implementation.id,
+                    'original_filename': ufile.filename,
+                    'note': note or False,
+                })
+            rec._store_stream(ufile.stream, ufile.filename)
+            stored_path = rec.stored_path
+            request.env.flush_all()
+        except Exception as e:
+            # rollback-ul nu atinge disk-ul: fișierul deja scris se șterge explicit
+            request.env.cr.rollback()
+            if stored_path and os.path.isfile(stored_path):
+                os.remove(stored_path)
+            if isinstance(e, (AccessError, ValidationError, ValueError)):
+                return _error(str(e))
+            raise
+
+        if redirect:
+            return request.redirect('/odoo/project.file/%s' % rec.id)
+        return request.make_json_response({
+            'id': rec.id,
+            'filename': rec.standard_filename,
+            'original_filename': rec.original_filename,
+        })
\ No newline at end of file
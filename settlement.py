@@ -37,9 +37,10 @@ class ProjectSettlement(models.Model):
 
     line_ids = fields.One2many('project.settlement.line', 'settlement_id', string='Linii decontare')
 
-    amount_elig_base_total = fields.Float(string='Total bază eligibil decontat', compute='_compute_totals', store=False)
-    amount_elig_vat_total = fields.Float(string='Total TVA eligibil decontat', compute='_compute_totals', store=False)
-    amount_total = fields.Float(string='Total decontare', compute='_compute_totals', store=False)
+    # totaluri stocate, întreținute din linii (liste sortabile / grupabile după valoare)
+    amount_elig_base_total = fields.Float(string='Total bază eligibil decontat', compute='_compute_totals', store=True)
+    amount_elig_vat_total = fields.Float(string='Total TVA eligibil decontat', compute='_compute_totals', store=True)
+    amount_total = fields.Float(string='Total decontare', compute='_compute_totals', store=True)
 
     @api.depends('line_ids.elig_base_amount', 'line_ids.elig_vat_amount')
     def _compute_totals(self):
@@ -63,6 +64,18 @@ class ProjectSettlement(models.Model):
             'context': dict(self.env.context),
         }
 
+    def action_open_fill_wizard(self):
+        """Completare automată din toate liniile de document nedecontate (filtrabilă)."""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Completare automată decontare'),
+            'res_model': 'project.settlement.fill.wizard',
+            'view_mode': 'form',
+            'context': {'default_settlement_id': self.id},
+            'target': 'new',
+        }
+
     # ----------------------------
     # NEW: blocăm ștergerea decontării dacă are linii
     # ----------------------------
@@ -98,8 +111,9 @@ class ProjectSettlementLine(models.Model):
         'project.implementation',
         string='Implementare',
         related='settlement_id.implementation_id',
-        store=False,
+        store=True,
         readonly=True,
+        index=True,
     )
 
     document_line_id = fields.Many2one(
@@ -107,7 +121,7 @@ class ProjectSettlementLine(models.Model):
         string='Linie document',
         required=True,
         ondelete='restrict',
-        domain="[('document_id.implementation_id', '=', implementation_id)]",
+        domain="[('implementation_id', '=', implementation_id)]",
         index=True,
     )
 
@@ -153,10 +167,9 @@ class ProjectSettlementLine(models.Model):
 
     @api.depends('implementation_id.funding_project_id.aport_coef')
     def _compute_neramb_coef(self):
+        funding = self.env['project.implementation.totals']._funding_snapshot(self.implementation_id.ids)
         for rec in self:
-            funding = rec.implementation_id.funding_project_id
-            aport_coef = getattr(funding, 'aport_coef', 0.0) or 0.0
-            rec.neramb_coef = max(0.0, 1.0 - aport_coef)
+            rec.neramb_coef = funding.neramb_coef(rec.implementation_id.id)
 
     # ----------------------------
     # Linie Deviz (prin document_line -> contract_line -> budget_proxy_line)
@@ -165,8 +178,9 @@ class ProjectSettlementLine(models.Model):
         'project.implementation.budget.line',
         string='Linie deviz (din document)',
         related='document_line_id.budget_proxy_line_id',
-        store=False,
+        store=True,
         readonly=True,
+        index=True,
     )
 
     # Rând 1 (Plan)
@@ -192,53 +206,36 @@ class ProjectSettlementLine(models.Model):
         'document_line_id',
         'elig_base_amount',
         'elig_vat_amount',
-        'implementation_id.settlement_ids.line_ids.elig_base_amount',
-        'implementation_id.settlement_ids.line_ids.elig_vat_amount',
-        'implementation_id.settlement_ids.line_ids.document_line_id',
+        # doar liniile de decontare de pe aceeași linie de deviz (nu toată implementarea)
+        'budget_proxy_line_id.contract_line_ids.document_line_ids.settlement_line_ids.elig_base_amount',
+        'budget_proxy_line_id.contract_line_ids.document_line_ids.settlement_line_ids.elig_vat_amount',
     )
     def _compute_budget_panel(self):
-        # ---- 1) PLAN ----
+        """Panoul Deviz pentru tot recordset-ul (și peste implementări): un GROUP BY pe linie deviz."""
+        # ---- 1) PLAN (coeficienți + deviz funding, citiți o dată pentru tot lotul) ----
+        funding = self.env['project.implementation.totals']._funding_snapshot(
+            self.implementation_id.ids, budget_line_ids=self.budget_proxy_line_id.ids,
+        )
         for rec in self:
-            b = rec.budget_proxy_line_id
-            if b and b.funding_budget_line_id:
-                fline = b.funding_budget_line_id
-                rec.budget_elig_base = fline.chelt_elig_baza or 0.0
-                rec.budget_elig_vat = fline.chelt_elig_tva or 0.0
-            else:
-                rec.budget_elig_base = 0.0
-                rec.budget_elig_vat = 0.0
+            plan = funding.plan(rec.budget_proxy_line_id.id)
+            rec.budget_elig_base, rec.budget_elig_vat = plan.elig_base, plan.elig_vat
 
-            coef = rec.neramb_coef or 0.0
+            coef = funding.neramb_coef(rec.implementation_id.id)
             rec.budget_neramb_base = (rec.budget_elig_base or 0.0) * coef
             rec.budget_neramb_vat = (rec.budget_elig_vat or 0.0) * coef
 
-        # ---- 2) DECONTAT (batch: 1 search per implementation, agregare python) ----
-        by_impl = {}
-        for rec in self:
-            if rec.implementation_id and rec.budget_proxy_line_id:
-                by_impl.setdefault(rec.implementation_id.id, set()).add(rec.budget_proxy_line_id.id)
-
-        totals = {}  # (impl_id, budget_proxy_id) -> (sum_base, sum_vat)
-
-        if by_impl:
-            for impl_id, budget_ids in by_impl.items():
-                lines = self.env['project.settlement.line'].search([
-                    ('settlement_id.implementation_id', '=', impl_id),
-                    ('document_line_id.budget_proxy_line_id', 'in', list(budget_ids)),
-                ])
-                for l in lines:
-                    bpl = l.document_line_id.budget_proxy_line_id
-                    if not bpl:
-                        continue
-                    key = (impl_id, bpl.id)
-                    base, vat = totals.get(key, (0.0, 0.0))
-                    totals[key] = (base + (l.elig_base_amount or 0.0), vat + (l.elig_vat_amount or 0.0))
+        # ---- 2) DECONTAT (un GROUP BY pe linie deviz, pentru tot recordset-ul) ----
+        budget_ids = [
+            rec.budget_proxy_line_id.id
+            for rec in self
+            if rec.implementation_id and rec.budget_proxy_line_id
+        ]
+        totals = self.env['project.implementation.totals']._settlement_totals_by_budget_line(budget_ids)
 
         # ---- 3) Setăm valori, excluzând linia curentă (prin scădere) ----
         for rec in self:
             if rec.implementation_id and rec.budget_proxy_line_id:
-                key = (rec.implementation_id.id, rec.budget_proxy_line_id.id)
-                total_base, total_vat = totals.get(key, (0.0, 0.0))
+                total_base, total_vat = totals.get(rec.budget_proxy_line_id.id, (0.0, 0.0))
 
                 if rec.id:
                     total_base -= (rec.elig_base_amount or 0.0)
@@ -277,11 +274,12 @@ class ProjectSettlementLine(models.Model):
         'implementation_id',
         'elig_base_amount',
         'elig_vat_amount',
-        'implementation_id.settlement_ids.line_ids.elig_base_amount',
-        'implementation_id.settlement_ids.line_ids.elig_vat_amount',
-        'implementation_id.settlement_ids.line_ids.document_line_id',
+        # doar liniile de decontare de pe aceeași linie de document (nu toată implementarea)
+        'document_line_id.settlement_line_ids.elig_base_amount',
+        'document_line_id.settlement_line_ids.elig_vat_amount',
     )
     def _compute_document_panel(self):
+        """Panoul Document pentru tot recordset-ul (și peste implementări): un GROUP BY pe linie document."""
         # ---- 1) PLAN ----
         for rec in self:
             dl = rec.document_line_id
@@ -292,32 +290,11 @@ class ProjectSettlementLine(models.Model):
             rec.doc_neramb_base = (rec.doc_elig_base or 0.0) * coef
             rec.doc_neramb_vat = (rec.doc_elig_vat or 0.0) * coef
 
-        # ---- 2) DECONTAT (batch: 1 search per implementation, agregare python) ----
-        by_impl = {}
+        # ---- 2+3) DECONTAT (stocat pe linia de document), excluzând linia curentă (prin scădere) ----
         for rec in self:
             if rec.implementation_id and rec.document_line_id:
-                by_impl.setdefault(rec.implementation_id.id, set()).add(rec.document_line_id.id)
-
-        totals = {}  # (impl_id, document_line_id) -> (sum_base, sum_vat)
-
-        if by_impl:
-            for impl_id, doc_line_ids in by_impl.items():
-                lines = self.env['project.settlement.line'].search([
-                    ('settlement_id.implementation_id', '=', impl_id),
-                    ('document_line_id', 'in', list(doc_line_ids)),
-                ])
-                for l in lines:
-                    if not l.document_line_id:
-                        continue
-                    key = (impl_id, l.document_line_id.id)
-                    base, vat = totals.get(key, (0.0, 0.0))
-                    totals[key] = (base + (l.elig_base_amount or 0.0), vat + (l.elig_vat_amount or 0.0))
-
-        # ---- 3) Setăm valori, excluzând linia curentă (prin scădere) ----
-        for rec in self:
-            if rec.implementation_id and rec.document_line_id:
-                key = (rec.implementation_id.id, rec.document_line_id.id)
-                total_base, total_vat = totals.get(key, (0.0, 0.0))
+                total_base = rec.document_line_id.settled_base or 0.0
+                total_vat = rec.document_line_id.settled_vat or 0.0
 
                 if rec.id:
                     total_base -= (rec.elig_base_amount or 0.0)
@@ -358,29 +335,26 @@ class ProjectSettlementLine(models.Model):
 
     @api.constrains('document_line_id', 'elig_base_amount', 'elig_vat_amount', 'settlement_id')
     def _check_document_line_in_same_implementation_and_limits(self):
-        for rec in self:
-            if not rec.document_line_id or not rec.settlement_id:
-                continue
+        # importurile / completarea în lot amână verificarea și o rulează o singură dată (_run_deferred_checks)
+        if self.env.context.get('defer_implementation_checks'):
+            return
+
+        Totals = self.env['project.implementation.totals']
+        # liniile de document sunt ledger-ul nerambursabilului: blocate înainte de citirea sumelor
+        Totals._lock_ledger_rows('project.document.line', self.document_line_id.ids)
 
+        checked = self.filtered(lambda r: r.document_line_id and r.settlement_id)
+        for rec in checked:
             if rec.document_line_id.document_id.implementation_id != rec.settlement_id.implementation_id:
                 raise ValidationError(_("Linia de document selectată nu aparține implementării curente."))
 
-            if not rec.implementation_id:
-                continue
-
-            coef = rec.neramb_coef or 0.0
-            max_base = (rec.document_line_id.elig_base_amount or 0.0) * coef
-            max_vat = (rec.document_line_id.elig_vat_amount or 0.0) * coef
-
-            other_lines = self.env['project.settlement.line'].search([
-                ('settlement_id.implementation_id', '=', rec.implementation_id.id),
-                ('document_line_id', '=', rec.document_line_id.id),
-                ('id', '!=', rec.id),
-            ])
-            total_base = (rec.elig_base_amount or 0.0) + sum(other_lines.mapped('elig_base_amount') or [0.0])
-            total_vat = (rec.elig_vat_amount or 0.0) + sum(other_lines.mapped('elig_vat_amount') or [0.0])
-
-            if total_base > (max_base + 0.0001):
+        # rămas de decontat = nerambursabil - total decontat (inclusiv liniile din lot), stocat pe linia document
+        for doc_line in checked.filtered('implementation_id').document_line_id:
+            if doc_line.remaining_base < -0.0001:
                 raise ValidationError(_("Depășești nerambursabilul pe Bază pentru această linie document."))
-            if total_vat > (max_vat + 0.0001):
-                raise ValidationError(_("Depășești nerambursabilul pe TVA pentru această linie document."))
\ No newline at end of file
+            if doc_line.remaining_vat < -0.0001:
+                raise ValidationError(_("Depășești nerambursabilul pe TVA pentru această linie document."))
+
+    def _run_deferred_checks(self):
+        """Verificările amânate cu `defer_implementation_checks`, o dată pe tot lotul."""
+        self.with_context(defer_implementation_checks=False)._check_document_line_in_same_implementation_and_limits()
\ No newline at end of file
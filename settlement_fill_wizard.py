@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo import models, fields, _
+from odoo.exceptions import ValidationError
+from odoo.tools import float_round
+
+_logger = logging.getLogger(__name__)
+
+
+class ProjectSettlementFillWizard(models.TransientModel):
+    _name = 'project.settlement.fill.wizard'
+    _description = 'Completare automată decontare'
+
+    settlement_id = fields.Many2one('project.settlement', string='Decontare', required=True, readonly=True)
+    implementation_id = fields.Many2one(
+        'project.implementation',
+        string='Implementare',
+        related='settlement_id.implementation_id',
+        readonly=True,
+    )
+
+    # filtre opționale
+    contract_id = fields.Many2one(
+        'project.contract',
+        string='Contract',
+        domain="[('implementation_id', '=', implementation_id)]",
+    )
+    budget_proxy_line_id = fields.Many2one(
+        'project.implementation.budget.line',
+        string='Linie deviz',
+        domain="[('implementation_id', '=', implementation_id)]",
+    )
+    date_from = fields.Date(string='Documente din')
+    date_to = fields.Date(string='Documente până la')
+
+    def _get_unsettled_domain(self):
+        """Liniile de document cu nerambursabil rămas (coloane stocate, indexate) + filtrele alese."""
+        self.ensure_one()
+        domain = [
+            ('implementation_id', '=', self.implementation_id.id),
+            '|', ('remaining_base', '>', 0.005), ('remaining_vat', '>', 0.005),
+        ]
+        if self.contract_id:
+            domain.append(('contract_id', '=', self.contract_id.id))
+        if self.budget_proxy_line_id:
+            domain.append(('budget_proxy_line_id', '=', self.budget_proxy_line_id.id))
+        if self.date_from:
+            domain.append(('document_id.document_date', '>=', self.date_from))
+        if self.date_to:
+            domain.append(('document_id.document_date', '<=', self.date_to))
+        return domain
+
+    def action_fill(self):
+        """Creează într-un singur create() câte o linie de decontare pe fiecare linie de document nedecontată."""
+        self.ensure_one()
+        if self.date_from and self.date_to and self.date_from > self.date_to:
+            raise ValidationError(_("Intervalul de date nu este valid."))
+
+        doc_lines = self.env['project.document.line'].search_fetch(
+            self._get_unsettled_domain(),
+            ['remaining_base', 'remaining_vat', 'vat_rate'],
+        )
+        if not doc_lines:
+            raise ValidationError(_("Nu există linii de document cu sume nerambursabile rămase de decontat."))
+
+        # remaining_* = eligibil * coef nerambursabil - decontat, deja calculat pe linie (stocat);
+        # rotunjim în jos: 85.0085 -> 85.00, nu 85.01 (ar depăși rămasul și ar pica verificarea)
+        rounding = self.env.company.currency_id.rounding
+
+        def _round_down(value):
+            return float_round(max(0.0, value), precision_rounding=rounding, rounding_method='DOWN')
+
+        vals_list = [
+            {
+                'settlement_id': self.settlement_id.id,
+                'document_line_id': dl.id,
+                'vat_rate': dl.vat_rate,
+                'elig_base_amount': _round_down(dl.remaining_base),
+                'elig_vat_amount': _round_down(dl.remaining_vat),
+                'elig_vat_manual': False,
+            }
+            for dl in doc_lines
+        ]
+        lines = self.env['project.settlement.line'].with_context(defer_implementation_checks=True).create(vals_list)
+        lines._run_deferred_checks()
+
+        _logger.info(
+            "Completare decontare settlement=%s: %s linii create",
+            self.settlement_id.id, len(lines),
+        )
+        return self.settlement_id.action_open_details()